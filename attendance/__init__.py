@@ -0,0 +1 @@
+"""Shared building blocks for the Stadium Attendance Prediction app."""
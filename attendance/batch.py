@@ -0,0 +1,42 @@
+"""Scoring a whole list of fixtures in one go.
+
+A fixture table has the same fields the app asks for: ``Competition``,
+``Matchday``, ``Home Team``, ``Away Team`` (optional, blank for European
+games), ``Date`` and ``Time`` (kickoff as ``HH:MM`` or hour). Optional
+``Weather`` and ``Temperature (°C)`` columns override the forecast lookup.
+Scoring itself is done by ``attendance.engine.predict_many``; this module
+only converts between DataFrames and fixtures.
+"""
+
+import pandas as pd
+
+from attendance.engine import predict_many, result_columns
+
+REQUIRED_COLUMNS = ["Competition", "Matchday", "Home Team", "Date", "Time"]
+
+RESULT_COLUMNS = [
+    "Predicted Attendance (%)", "Predicted Attendance", "Max Capacity",
+    "Attendance Status", "Weather Used",
+]
+
+
+def score_fixtures(fixtures, fetch_weather=True):
+    """Predict attendance for every fixture in ``fixtures``.
+
+    ``fixtures`` is a DataFrame (or anything ``pd.DataFrame`` accepts). The
+    input columns are returned unchanged together with the predicted
+    percentage, the absolute attendance capped at the stadium capacity, the
+    Low/Normal/High status and whether weather information was used.
+    """
+    fixtures = pd.DataFrame(fixtures).reset_index(drop=True)
+    missing = [column for column in REQUIRED_COLUMNS if column not in fixtures.columns]
+    if missing:
+        raise ValueError(f"Fixture list is missing columns: {missing}")
+
+    # Dates in any format pandas understands, blanks as None for the engine
+    records = fixtures.assign(Date=pd.to_datetime(fixtures["Date"]).dt.date)
+    records = records.astype(object).where(records.notna(), None).to_dict("records")
+    predictions = predict_many(records, fetch_weather=fetch_weather)
+
+    results = pd.DataFrame([result_columns(prediction) for prediction in predictions], columns=RESULT_COLUMNS)
+    return pd.concat([fixtures.drop(columns=RESULT_COLUMNS, errors="ignore"), results], axis=1)
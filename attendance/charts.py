@@ -0,0 +1,76 @@
+"""SVG rendering of the attendance prediction bar.
+
+The chart is a fixed layout (one horizontal bar, two percentile markers, an
+axis and a legend), so it is produced by filling a small SVG template rather
+than drawing and rasterising a matplotlib figure. Results are memoised on the
+rounded inputs.
+"""
+
+import base64
+from functools import lru_cache
+
+# Plot area inside the 1000 x 250 canvas
+WIDTH, HEIGHT = 1000, 250
+LEFT, RIGHT, TOP, BOTTOM = 40, 960, 55, 175
+
+SVG_TEMPLATE = """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="{width}" height="{height}" font-family="DejaVu Sans, Arial, sans-serif">
+<rect width="{width}" height="{height}" fill="#f8f9fa"/>
+<text x="{center}" y="30" text-anchor="middle" font-size="18" fill="#333333">{title}</text>
+<rect x="{left}" y="{top}" width="{plot_width}" height="{plot_height}" fill="#ffffff"/>
+<rect x="{left}" y="{bar_y}" width="{bar_width}" height="{bar_height}" fill="#28a745" fill-opacity="0.8" stroke="black"/>
+<line x1="{p30_x}" y1="{top}" x2="{p30_x}" y2="{bottom}" stroke="red" stroke-width="1.6" stroke-dasharray="7 4"/>
+<line x1="{p70_x}" y1="{top}" x2="{p70_x}" y2="{bottom}" stroke="blue" stroke-width="1.6" stroke-dasharray="7 4"/>
+<line x1="{left}" y1="{top}" x2="{left}" y2="{bottom}" stroke="black"/>
+<line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}" stroke="black"/>
+{ticks}
+<line x1="{legend_x}" y1="228" x2="{legend_x_end}" y2="228" stroke="red" stroke-width="1.6" stroke-dasharray="7 4"/>
+<text x="{legend_text_x}" y="233" font-size="15" fill="#333333">30th Percentile</text>
+<line x1="{legend2_x}" y1="228" x2="{legend2_x_end}" y2="228" stroke="blue" stroke-width="1.6" stroke-dasharray="7 4"/>
+<text x="{legend2_text_x}" y="233" font-size="15" fill="#333333">70th Percentile</text>
+</svg>"""
+
+TICK_TEMPLATE = (
+    '<line x1="{x}" y1="{bottom}" x2="{x}" y2="{tick_end}" stroke="black"/>'
+    '<text x="{x}" y="{label_y}" text-anchor="middle" font-size="15" fill="#333333">{label}</text>'
+)
+
+
+def _x(fraction):
+    # Position of a capacity fraction on the x axis, clipped to the plot area
+    fraction = min(max(fraction, 0.0), 1.0)
+    return round(LEFT + fraction * (RIGHT - LEFT), 1)
+
+
+@lru_cache(maxsize=256)
+def attendance_chart_svg(predicted_attendance, max_capacity, attendance_30th, attendance_70th, prediction):
+    """SVG markup of the predicted attendance bar with 30th/70th percentile markers."""
+    plot_height = BOTTOM - TOP
+    ticks = "\n".join(
+        TICK_TEMPLATE.format(x=_x(fraction), bottom=BOTTOM, tick_end=BOTTOM + 6,
+                             label_y=BOTTOM + 24, label=f"{fraction:.0%}")
+        for fraction in (0, 0.25, 0.5, 0.75, 1)
+    )
+    return SVG_TEMPLATE.format(
+        width=WIDTH, height=HEIGHT, center=WIDTH // 2,
+        left=LEFT, right=RIGHT, top=TOP, bottom=BOTTOM,
+        plot_width=RIGHT - LEFT, plot_height=plot_height,
+        title=f"Predicted Attendance: {predicted_attendance:.0f} of {max_capacity} ({prediction:.2f}%)",
+        bar_y=TOP + plot_height // 4, bar_height=plot_height // 2,
+        bar_width=round(_x(predicted_attendance / max_capacity) - LEFT, 1),
+        p30_x=_x(attendance_30th / max_capacity), p70_x=_x(attendance_70th / max_capacity),
+        ticks=ticks,
+        legend_x=330, legend_x_end=370, legend_text_x=378,
+        legend2_x=530, legend2_x_end=570, legend2_text_x=578,
+    )
+
+
+def attendance_chart_data_uri(predicted_attendance, max_capacity, attendance_30th, attendance_70th, prediction):
+    """The chart as a ``data:`` URI for an ``<img>`` tag.
+
+    Inputs are rounded first so that repeated predictions hit the cache.
+    """
+    svg = attendance_chart_svg(
+        float(round(predicted_attendance)), int(max_capacity),
+        float(attendance_30th), float(attendance_70th), round(float(prediction), 2),
+    )
+    return "data:image/svg+xml;base64," + base64.b64encode(svg.encode("utf-8")).decode("ascii")
@@ -0,0 +1,146 @@
+"""Command-line scoring of fixture exports.
+
+Reads fixtures as JSON lines or CSV (from a file or stdin), scores them in
+fixed-size chunks through ``attendance.engine`` and writes one JSON object
+per fixture to stdout: the input fields followed by the result columns of
+the batch scorer. Only one chunk is held in memory at a time, so the input
+can be arbitrarily long.
+
+    python -m attendance.cli fixtures.jsonl > predictions.jsonl
+    cat fixtures.csv | python -m attendance.cli --format csv --fetch-weather
+
+Fixtures use the app's column names (``Competition``, ``Matchday``,
+``Home Team``, ``Away Team``, ``Date``, ``Time`` and optionally ``Weather``
+and ``Temperature (°C)``). Without ``--fetch-weather`` only the weather given
+in the input is used and other rows go to the no-weather model. A fixture that
+cannot be scored is written as ``{"error": ...}`` at its position and the run
+continues.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from attendance.engine import as_fixture, check_fixtures, predict_fixtures, result_columns
+
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def read_fixtures(file, input_format):
+    """Yield fixtures (dicts) from an open text file, one at a time.
+
+    A JSON line that cannot be decoded is yielded as a ``ValueError`` in its
+    place, so ``score_chunk`` reports it without ending the run.
+    """
+    if input_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield ValueError(f"Line {number} is not valid JSON: {error}")
+
+
+def score_chunk(records, fetch_weather=False):
+    """Result dict per input record; rows that fail validation get an ``error``.
+
+    Records that are not objects (including the errors from ``read_fixtures``)
+    become ``{"error": ...}`` alone.
+
+    Bulk input bypasses the prediction cache so it does not evict the
+    entries of interactive sessions in the same process.
+    """
+    outputs = [None] * len(records)
+    valid, fixtures = [], []
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            message = str(record) if isinstance(record, ValueError) else "Expected a fixture object"
+            outputs[position] = {"error": message}
+            continue
+        try:
+            fixtures.append(as_fixture(record))
+        except (ValueError, TypeError) as error:
+            outputs[position] = {**record, "error": str(error)}
+        else:
+            valid.append(position)
+    try:
+        check_fixtures(fixtures)
+    except ValueError:
+        # Find the offending rows one by one; only happens for bad input
+        checked = []
+        for position, fixture in zip(valid, fixtures):
+            try:
+                check_fixtures([fixture])
+            except ValueError as error:
+                outputs[position] = {**records[position], "error": str(error)}
+            else:
+                checked.append((position, fixture))
+        valid, fixtures = [position for position, _ in checked], [fixture for _, fixture in checked]
+    for position, prediction in zip(valid, predict_fixtures(fixtures, fetch_weather=fetch_weather, use_cache=False)):
+        outputs[position] = {**records[position], **result_columns(prediction)}
+    return outputs
+
+
+def score_stream(records, output, chunk_size=DEFAULT_CHUNK_SIZE, fetch_weather=False):
+    """Score an iterable of fixture dicts and write JSON lines to ``output``.
+
+    Returns the number of scored fixtures and of fixtures with an error.
+    """
+    records = iter(records)
+    scored = failed = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return scored, failed
+        lines = []
+        for result in score_chunk(chunk, fetch_weather):
+            failed += "error" in result
+            lines.append(json.dumps(result, ensure_ascii=False, default=str))
+        output.write("\n".join(lines) + "\n")
+        scored += len(chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m attendance.cli", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", nargs="?", default="-", help="fixture file, '-' for stdin (default)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"fixtures encoded and predicted per batch (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--fetch-weather", action="store_true",
+                        help="look up the forecast for fixtures without weather in the input")
+    parser.add_argument("--output", "-o", default="-", help="output file, '-' for stdout (default)")
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    input_file = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        scored, failed = score_stream(
+            read_fixtures(input_file, input_format), output_file,
+            chunk_size=max(1, args.chunk_size), fetch_weather=args.fetch_weather,
+        )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    elapsed = time.perf_counter() - start
+    print(f"Scored {scored} fixtures ({failed} with errors) in {elapsed:.2f} s "
+          f"({scored / elapsed if elapsed else 0:.0f} fixtures/s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
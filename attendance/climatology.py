@@ -0,0 +1,80 @@
+"""Typical match weather per stadium, month and kickoff hour.
+
+Open-Meteo only forecasts about two weeks ahead. For matches further out the
+weather model can still be used with a climatological estimate: the median
+temperature and the most frequent weather category observed at past matches
+in ``football_results-3.csv``. The table is built once with a few groupbys
+and then answers lookups from plain dicts.
+"""
+
+import os
+import threading
+
+from attendance.models import BASE_DIR
+
+RESULTS_PATH = os.path.join(BASE_DIR, "football_results-3.csv")
+
+# Fewest past matches a group needs before it is trusted over a coarser one
+MIN_SAMPLES = 3
+
+
+class Climatology:
+    """Temperature and weather-category statistics at several levels of detail.
+
+    ``levels`` holds, from most to least specific, the grouping columns and a
+    dict mapping each group to its temperature median/mean/std, the share of
+    every weather category, the most frequent ``condition`` and the match
+    ``count``.
+    """
+
+    def __init__(self, levels):
+        self.levels = levels
+
+    @classmethod
+    def from_results(cls, path=RESULTS_PATH):
+        """Build the table from the historical match results."""
+        import pandas as pd
+
+        results = pd.read_csv(path, usecols=["Stadium", "Month", "Time", "Weather", "Temperature (°C)"])
+        results = results.dropna(subset=["Temperature (°C)", "Weather"])
+        results = results.rename(columns={"Temperature (°C)": "Temperature", "Time": "Hour"})
+
+        levels = []
+        for keys in (["Stadium", "Month", "Hour"], ["Stadium", "Month"], ["Month"]):
+            temperature = results.groupby(keys)["Temperature"].agg(["median", "mean", "std", "count"])
+            frequencies = pd.crosstab([results[key] for key in keys], results["Weather"], normalize="index")
+            table = temperature.join(frequencies).join(frequencies.idxmax(axis=1).rename("condition"))
+            entries = table.round(2).to_dict("index")
+            levels.append((tuple(keys), {
+                key if isinstance(key, tuple) else (key,): entry for key, entry in entries.items()
+            }))
+        overall = {
+            "median": round(float(results["Temperature"].median()), 2),
+            "condition": results["Weather"].mode().iloc[0],
+            "count": len(results),
+        }
+        levels.append(((), {(): overall}))
+        return cls(levels)
+
+    def estimate(self, stadium, month, hour):
+        """Typical ``(temperature, condition)`` for a kickoff at ``stadium``."""
+        values = {"Stadium": stadium, "Month": month, "Hour": hour}
+        for keys, table in self.levels:
+            entry = table.get(tuple(values[key] for key in keys))
+            if entry is not None and (entry["count"] >= MIN_SAMPLES or not keys):
+                return round(entry["median"], 1), entry["condition"]
+        return None, None
+
+
+_climatology = None
+_climatology_lock = threading.Lock()
+
+
+def get_climatology():
+    """Process-wide climatology table, built on first use."""
+    global _climatology
+    if _climatology is None:
+        with _climatology_lock:
+            if _climatology is None:
+                _climatology = Climatology.from_results()
+    return _climatology
@@ -0,0 +1,375 @@
+"""Precomputed no-weather predictions, shared between processes via mmap.
+
+Without weather, the fallback model only sees discrete inputs. These are
+the two teams (and, through the league table, their ranking and form), the
+competition, the matchday, the kickoff hour, the weekday, the month and the
+day.
+
+``build_cube`` evaluates the model once for every combination of home team,
+away team, competition/matchday, kickoff-hour band and date in a window of
+``DEFAULT_DAYS`` days. It stores the results as one dense float32 ``.npy``
+array indexed by those codes. NaN marks combinations that cannot occur,
+such as a team playing itself.
+
+Kickoff hours are grouped into the bands between the model's own split
+thresholds on ``Time``. Every hour in a band therefore has exactly the same
+prediction.
+
+The array is opened with ``mmap_mode="r"``, so every Streamlit worker maps
+the same file and the OS keeps a single copy of its pages. The cube is tied
+to a fingerprint of the ``.sav`` file and ``new_league_data.csv``.
+``get_prediction_cube`` ignores a cube whose fingerprint no longer matches,
+and the prediction falls back to the model.
+
+    python -m attendance.cube               # rebuild if out of date
+    python -m attendance.cube --watch 300   # check every five minutes
+"""
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from attendance.features import category_label
+from attendance.league import get_league_store
+from attendance.models import CACHE_DIR, get_compiled_model, get_encoder, model_version
+from attendance.teams import AVAILABLE_COMPETITIONS, TEAM_DATA
+
+logger = logging.getLogger(__name__)
+
+CUBE_DIR = os.path.join(CACHE_DIR, "cube")
+MODEL_NAME = "without_weather"
+# Bumped whenever the layout of the array changes
+CUBE_FORMAT = 1
+
+# Days covered from the build date on; later fixtures are predicted by the model
+DEFAULT_DAYS = 366
+# Rebuild once the window start is this many days in the past
+MAX_WINDOW_AGE = 30
+
+# Competitions with a league opponent; the others are played against "Unknown"
+DOMESTIC_COMPETITIONS = ("Super League", "Swiss Cup")
+SUPER_LEAGUE_MATCHDAYS = range(1, 39)
+STAGES = ["Qualification", "Group Stage", "Knockout Stage"]
+
+
+def cube_kinds():
+    """Every (competition, matchday) the app can ask for."""
+    kinds = []
+    for competition in AVAILABLE_COMPETITIONS:
+        matchdays = SUPER_LEAGUE_MATCHDAYS if competition == "Super League" else STAGES
+        kinds.extend((competition, matchday) for matchday in matchdays)
+    return kinds
+
+
+class CubeLayout:
+    """Axis labels of the cube and the position of every label.
+
+    Axes are home team, away team, (competition, matchday), kickoff-hour
+    band and day offset from ``start``.
+    """
+
+    def __init__(self, home_teams, away_teams, kinds, time_thresholds, start, days):
+        self.home_teams = list(home_teams)
+        self.away_teams = list(away_teams)
+        self.kinds = [(competition, matchday) for competition, matchday in kinds]
+        self.time_thresholds = np.asarray(time_thresholds, dtype=np.float32)
+        self.start = start
+        self.days = days
+        self.home_index = {team: position for position, team in enumerate(self.home_teams)}
+        self.away_index = {team: position for position, team in enumerate(self.away_teams)}
+        self.kind_index = {
+            (competition, category_label(matchday)): position
+            for position, (competition, matchday) in enumerate(self.kinds)
+        }
+
+    @property
+    def shape(self):
+        return (len(self.home_teams), len(self.away_teams), len(self.kinds),
+                len(self.time_thresholds) + 1, self.days)
+
+    def band_hours(self):
+        """One kickoff hour inside each band, used to evaluate the band.
+
+        A band starts at its threshold (``Time >= threshold`` goes right), so
+        the first whole hour in it is the threshold rounded up.
+        """
+        if not len(self.time_thresholds):
+            return [15]
+        thresholds = [math.ceil(threshold) for threshold in self.time_thresholds]
+        return [thresholds[0] - 1] + thresholds
+
+    def is_possible(self, home_team, away_team, competition):
+        if competition in DOMESTIC_COMPETITIONS:
+            return away_team not in (home_team, "Unknown")
+        return away_team == "Unknown"
+
+    def index(self, fixture):
+        """Cube coordinates of a normalised fixture, or ``None`` if it is not covered."""
+        home = self.home_index.get(fixture.home_team)
+        away = self.away_index.get(fixture.away_team)
+        kind = self.kind_index.get((fixture.competition, category_label(fixture.matchday)))
+        offset = (fixture.date - self.start).days
+        if home is None or away is None or kind is None or not 0 <= offset < self.days:
+            return None
+        band = int(np.searchsorted(self.time_thresholds, fixture.hour, side="right"))
+        return home, away, kind, band, offset
+
+    def to_dict(self):
+        return {
+            "home_teams": self.home_teams,
+            "away_teams": self.away_teams,
+            "kinds": self.kinds,
+            "time_thresholds": self.time_thresholds.tolist(),
+            "start": self.start.isoformat(),
+            "days": self.days,
+        }
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(values["home_teams"], values["away_teams"], values["kinds"], values["time_thresholds"],
+                   datetime.date.fromisoformat(values["start"]), values["days"])
+
+    @classmethod
+    def current(cls, start=None, days=DEFAULT_DAYS):
+        """Layout for the current model and teams, starting ``start`` (default today)."""
+        teams = sorted(TEAM_DATA)
+        thresholds = get_compiled_model(MODEL_NAME).split_thresholds("Time")
+        return cls(teams, teams + ["Unknown"], cube_kinds(), thresholds, start or datetime.date.today(), days)
+
+
+_league_digest = (None, None)
+
+
+def current_fingerprint():
+    """Identifies the model file and league table the predictions depend on."""
+    global _league_digest
+    league_store = get_league_store()
+    current, _ = league_store.snapshot()
+    version, digest = _league_digest
+    if version != current:
+        with open(league_store.path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()[:16]
+        _league_digest = (current, digest)
+    return f"{CUBE_FORMAT}-{model_version(MODEL_NAME)}-{digest}"
+
+
+class PredictionCube:
+    """Read-only view of a built cube."""
+
+    def __init__(self, values, layout, fingerprint):
+        self.values = values
+        self.layout = layout
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def load(cls, directory=CUBE_DIR):
+        """Memory-map the cube described by ``cube.json`` in ``directory``."""
+        with open(os.path.join(directory, "cube.json"), encoding="utf-8") as file:
+            meta = json.load(file)
+        layout = CubeLayout.from_dict(meta)
+        values = np.load(os.path.join(directory, meta["file"]), mmap_mode="r")
+        if values.shape != layout.shape:
+            raise ValueError(f"Cube shape {values.shape} does not match its layout {layout.shape}")
+        return cls(values, layout, meta["fingerprint"])
+
+    def lookup(self, fixtures):
+        """Model output per normalised fixture, NaN where the cube has no value."""
+        coordinates = [self.layout.index(fixture) for fixture in fixtures]
+        result = np.full(len(fixtures), np.nan, dtype=np.float32)
+        covered = [position for position, index in enumerate(coordinates) if index is not None]
+        if covered:
+            axes = np.array([coordinates[position] for position in covered]).T
+            result[covered] = self.values[tuple(axes)]
+        return result
+
+
+_cube = None
+_cube_version = None
+_cube_lock = threading.Lock()
+
+
+def get_prediction_cube(directory=CUBE_DIR):
+    """The current cube, or ``None`` if there is none or it is out of date.
+
+    The map is reopened whenever ``cube.json`` is replaced by a rebuild.
+    """
+    global _cube, _cube_version
+    try:
+        version = os.stat(os.path.join(directory, "cube.json")).st_mtime_ns
+    except OSError:
+        return None
+    if version != _cube_version:
+        with _cube_lock:
+            if version != _cube_version:
+                try:
+                    _cube = PredictionCube.load(directory)
+                except (OSError, ValueError, KeyError):
+                    logger.warning("Could not open the prediction cube in %s", directory, exc_info=True)
+                    _cube = None
+                _cube_version = version
+    cube = _cube
+    if cube is None or cube.fingerprint != current_fingerprint():
+        return None
+    return cube
+
+
+def _fill_home(path, layout_values, home_position, chunk_rows):
+    # Evaluate every (away, kind) block of one home team into the open cube file
+    from attendance.engine import Fixture, build_features
+
+    layout = CubeLayout.from_dict(layout_values)
+    cube = np.load(path, mmap_mode="r+")
+    model = get_compiled_model(MODEL_NAME)
+    encoder = get_encoder(MODEL_NAME)
+    teams = get_league_store().by_team()
+    home_team = layout.home_teams[home_position]
+
+    # The hour band and date axes only touch these columns
+    hours = layout.band_hours()
+    dates = [layout.start + datetime.timedelta(days=offset) for offset in range(layout.days)]
+    block_rows = len(hours) * len(dates)
+    grid_hours = np.repeat(np.asarray(hours, dtype=np.float32), len(dates))
+    grid_months = np.tile(np.asarray([date.month for date in dates], dtype=np.float32), len(hours))
+    grid_days = np.tile(np.asarray([date.day for date in dates], dtype=np.float32), len(hours))
+    weekday_columns = [position for (field, _), position in encoder.category_index.items() if field == "Weekday"]
+    grid_weekdays = np.tile(np.asarray(
+        [encoder.category_index.get(("Weekday", date.strftime("%A")), -1) for date in dates]
+    ), len(hours))
+    grid_rows = np.arange(block_rows)[grid_weekdays >= 0]
+    grid_weekdays = grid_weekdays[grid_weekdays >= 0]
+
+    blocks = [
+        (away, kind) for away, away_team in enumerate(layout.away_teams)
+        for kind, (competition, _) in enumerate(layout.kinds)
+        if layout.is_possible(home_team, away_team, competition)
+    ]
+    per_chunk = max(1, chunk_rows // block_rows)
+    for chunk_start in range(0, len(blocks), per_chunk):
+        chunk = blocks[chunk_start:chunk_start + per_chunk]
+        X = np.empty((len(chunk) * block_rows, encoder.n_features), dtype=np.float32)
+        for position, (away, kind) in enumerate(chunk):
+            competition, matchday = layout.kinds[kind]
+            fixture = Fixture(competition, matchday, home_team, layout.start, hours[0], layout.away_teams[away])
+            block = X[position * block_rows:(position + 1) * block_rows]
+            block[:] = encoder.encode(build_features(fixture, teams=teams))
+            block[:, encoder.numeric_index["Time"]] = grid_hours
+            block[:, encoder.numeric_index["Month"]] = grid_months
+            block[:, encoder.numeric_index["Day"]] = grid_days
+            block[:, weekday_columns] = 0
+            block[grid_rows, grid_weekdays] = 1
+        predictions = model.predict(X).reshape(len(chunk), len(hours), len(dates))
+        for position, (away, kind) in enumerate(chunk):
+            cube[home_position, away, kind] = predictions[position]
+    cube.flush()
+    return home_team
+
+
+def build_cube(directory=CUBE_DIR, start=None, days=DEFAULT_DAYS, n_jobs=1, chunk_rows=1 << 16):
+    """Evaluate and write a new cube, then switch ``cube.json`` over to it.
+
+    ``n_jobs`` home teams are filled in parallel worker processes. Returns
+    the metadata of the new cube.
+    """
+    started = time.perf_counter()
+    layout = CubeLayout.current(start, days)
+    fingerprint = current_fingerprint()
+    name = f"{MODEL_NAME}-{fingerprint}-{layout.start:%Y%m%d}.npy"
+    path = os.path.join(directory, name)
+    os.makedirs(directory, exist_ok=True)
+
+    partial = path + ".partial"
+    cube = np.lib.format.open_memmap(partial, mode="w+", dtype=np.float32, shape=layout.shape)
+    cube[:] = np.nan
+    cube.flush()
+    del cube
+
+    jobs = [(partial, layout.to_dict(), home, chunk_rows) for home in range(len(layout.home_teams))]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for home_team in pool.map(_fill_home, *zip(*jobs)):
+                logger.info("Filled %s", home_team)
+    else:
+        for job in jobs:
+            logger.info("Filled %s", _fill_home(*job))
+    os.replace(partial, path)
+
+    meta = {
+        "format": CUBE_FORMAT,
+        "fingerprint": fingerprint,
+        "file": name,
+        "built_at": time.time(),
+        "build_seconds": round(time.perf_counter() - started, 2),
+        **layout.to_dict(),
+    }
+    meta_path = os.path.join(directory, "cube.json")
+    with open(meta_path + ".partial", "w", encoding="utf-8") as file:
+        json.dump(meta, file, ensure_ascii=False)
+    os.replace(meta_path + ".partial", meta_path)
+
+    # Processes that still map an old file keep reading it until they reopen
+    for old_path in glob.glob(os.path.join(directory, f"{MODEL_NAME}-*.npy")):
+        if old_path != path:
+            os.remove(old_path)
+    return meta
+
+
+def cube_status(directory=CUBE_DIR):
+    """``(is_current, reason)`` for the cube in ``directory``."""
+    try:
+        with open(os.path.join(directory, "cube.json"), encoding="utf-8") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return False, "no cube built yet"
+    if meta.get("fingerprint") != current_fingerprint():
+        return False, "model or league data changed"
+    age = (datetime.date.today() - datetime.date.fromisoformat(meta["start"])).days
+    if age > MAX_WINDOW_AGE:
+        return False, f"date window started {age} days ago"
+    return True, f"up to date ({meta['file']})"
+
+
+def ensure_cube(directory=CUBE_DIR, days=DEFAULT_DAYS, n_jobs=1, force=False):
+    """Rebuild the cube if it is missing or out of date; returns whether it did."""
+    current, reason = cube_status(directory)
+    if current and not force:
+        logger.info("Prediction cube is %s", reason)
+        return False
+    logger.info("Building the prediction cube: %s", reason if not current else "forced")
+    meta = build_cube(directory, days=days, n_jobs=n_jobs)
+    logger.info("Built %s %s in %.1f s", meta["file"], CubeLayout.from_dict(meta).shape, meta["build_seconds"])
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m attendance.cube", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS,
+                        help=f"days covered from today (default: {DEFAULT_DAYS})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the cube is current")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep running and check for changes every SECONDS")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    ensure_cube(days=args.days, n_jobs=args.jobs, force=args.force)
+    while args.watch:
+        time.sleep(args.watch)
+        ensure_cube(days=args.days, n_jobs=args.jobs)
+
+
+if __name__ == "__main__":
+    main()
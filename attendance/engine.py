@@ -0,0 +1,291 @@
+"""Headless attendance prediction.
+
+Everything the app does between reading the inputs and drawing the result:
+resolving a fixture against the league table, looking up the weather,
+encoding the features, choosing and evaluating the model, capping the
+attendance at the stadium capacity and classifying it. Nothing here imports
+Streamlit or pandas, so batch jobs and benchmarks can call it directly:
+
+    >>> from attendance.engine import predict_attendance
+    >>> predict_attendance({"Competition": "Super League", "Matchday": 12,
+    ...                     "Home Team": "FC Basel", "Away Team": "FC Zürich",
+    ...                     "Date": "2025-11-02", "Time": "16:30"})
+    Prediction(percentage=..., attendance=..., ...)
+
+``predict_many`` scores a list of fixtures with one encode and one model
+evaluation per model.
+"""
+
+import datetime
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from attendance.cube import DOMESTIC_COMPETITIONS, cube_kinds, get_prediction_cube
+from attendance.features import category_label
+from attendance.league import get_league_store
+from attendance.metrics import count_predictions
+from attendance.models import get_compiled_model, get_encoder
+from attendance.prediction_cache import cached_predict
+from attendance.teams import AVAILABLE_COMPETITIONS, TEAM_DATA, TEAM_LOCATIONS, attendance_status
+from attendance.timing import timed, timer
+from attendance.weather import NO_WEATHER, WEATHER_DEADLINE, MatchWeather, submit_location_weather, wait_for_weather
+
+# A match to predict. hour is the kickoff hour; weather and temperature are
+# optional and, when given, take precedence over the forecast lookup
+Fixture = namedtuple("Fixture", [
+    "competition", "matchday", "home_team", "date", "hour", "away_team", "weather", "temperature",
+], defaults=("Unknown", None, None))
+
+# Column names used by the app and fixture files -> Fixture fields
+FIXTURE_COLUMNS = {
+    "Competition": "competition",
+    "Matchday": "matchday",
+    "Home Team": "home_team",
+    "Away Team": "away_team",
+    "Date": "date",
+    "Time": "hour",
+    "Weather": "weather",
+    "Temperature (°C)": "temperature",
+}
+
+# (competition, matchday label) pairs the models were trained on: matchdays
+# 1-38 in the Super League, the stage names in the other competitions
+VALID_MATCHDAYS = frozenset((competition, category_label(matchday)) for competition, matchday in cube_kinds())
+
+# model is "with_weather" or "without_weather"; weather is the MatchWeather used
+Prediction = namedtuple("Prediction", [
+    "percentage", "attendance", "max_capacity", "status", "model", "weather",
+])
+
+
+def _is_missing(value):
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+def kickoff_hour(value):
+    """Hour of a kickoff given as ``datetime.time``, ``"HH:MM"`` or a number."""
+    if isinstance(value, (datetime.time, datetime.datetime)):
+        return value.hour
+    if isinstance(value, str):
+        return int(value.strip().split(":")[0])
+    return int(value)
+
+
+def match_date(value):
+    """A ``datetime.date`` from a date, a datetime or an ISO ``YYYY-MM-DD`` string."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value).strip()[:10])
+
+
+def as_fixture(fixture):
+    """Normalise a ``Fixture`` or a mapping keyed by app column names or field names."""
+    if not isinstance(fixture, Fixture):
+        values = {
+            FIXTURE_COLUMNS.get(key, key): value for key, value in fixture.items()
+            if FIXTURE_COLUMNS.get(key, key) in Fixture._fields
+        }
+        missing = [field for field in Fixture._fields[:5] if field not in values]
+        if missing:
+            raise ValueError(f"Fixture is missing fields: {missing}")
+        fixture = Fixture(**values)
+    away_team = fixture.away_team
+    temperature = fixture.temperature
+    return fixture._replace(
+        home_team=str(fixture.home_team).strip(),
+        away_team="Unknown" if _is_missing(away_team) else str(away_team).strip(),
+        date=match_date(fixture.date),
+        hour=kickoff_hour(fixture.hour),
+        weather=None if _is_missing(fixture.weather) else fixture.weather,
+        temperature=None if _is_missing(temperature) else float(temperature),
+    )
+
+
+def check_fixtures(fixtures, league_store=None):
+    """Raise ``ValueError`` naming every competition, matchday, kickoff hour
+    or team the models cannot score."""
+    unknown_competitions = sorted({fixture.competition for fixture in fixtures} - set(AVAILABLE_COMPETITIONS), key=str)
+    if unknown_competitions:
+        raise ValueError(f"Unknown competitions: {unknown_competitions}")
+    invalid_matchdays = sorted({
+        (fixture.competition, category_label(fixture.matchday)) for fixture in fixtures
+    } - VALID_MATCHDAYS)
+    if invalid_matchdays:
+        raise ValueError(f"Invalid matchdays (competition, matchday): {invalid_matchdays}")
+    invalid_hours = sorted({fixture.hour for fixture in fixtures} - set(range(24)))
+    if invalid_hours:
+        raise ValueError(f"Kickoff hours outside 0-23: {invalid_hours}")
+    self_matches = sorted({
+        fixture.home_team for fixture in fixtures
+        if fixture.competition in DOMESTIC_COMPETITIONS and fixture.home_team == fixture.away_team
+    })
+    if self_matches:
+        raise ValueError(f"Teams drawn against themselves: {self_matches}")
+    league_teams = (league_store or get_league_store()).by_team()
+    home_teams = {fixture.home_team for fixture in fixtures}
+    unknown_home = sorted(home_teams - set(TEAM_DATA))
+    if unknown_home:
+        raise ValueError(f"Unknown home teams: {unknown_home}")
+    teams = home_teams | {fixture.away_team for fixture in fixtures} - {"Unknown"}
+    missing_teams = sorted(teams - set(league_teams))
+    if missing_teams:
+        raise ValueError(f"Teams not found in the league data: {missing_teams}")
+
+
+def build_features(fixture, weather=NO_WEATHER, teams=None):
+    """The raw model inputs for a normalised fixture and its ``MatchWeather``.
+
+    ``teams`` is the league table by team (``LeagueStore.by_team()``).
+    """
+    teams = teams if teams is not None else get_league_store().by_team()
+    home = teams[fixture.home_team]
+    away_ranking = 0 if fixture.away_team == "Unknown" else teams[fixture.away_team].ranking
+    return {
+        "Competition": fixture.competition,
+        "Matchday": fixture.matchday,
+        "Time": fixture.hour,
+        "Home Team": fixture.home_team,
+        "Ranking Home Team": home.ranking,
+        "Away Team": fixture.away_team,
+        "Ranking Away Team": away_ranking,
+        "Weather": weather.condition,
+        "Temperature (°C)": weather.temperature,
+        "Weekday": fixture.date.strftime("%A"),
+        "Month": fixture.date.month,
+        "Day": fixture.date.day,
+        "Goals Scored in Last 5 Games": home.goals_scored_last_5,
+        "Goals Conceded in Last 5 Games": home.goals_conceded_last_5,
+        "Number of Wins in Last 5 Games": home.wins_last_5,
+    }
+
+
+def resolve_weather(fixtures, fetch_weather=True, timeout=WEATHER_DEADLINE):
+    """A ``MatchWeather`` per fixture.
+
+    Weather given in the fixture wins; otherwise each distinct
+    (stadium, date, hour) is looked up once, all of them concurrently.
+    Lookups that fail or are not done within ``timeout`` seconds in total
+    give ``NO_WEATHER``, so those fixtures use the fallback model.
+    """
+    keys = [
+        None if fixture.temperature is not None or not fetch_weather
+        else (TEAM_LOCATIONS[fixture.home_team], fixture.date, fixture.hour)
+        for fixture in fixtures
+    ]
+    deadline = time.monotonic() + timeout
+    lookups = {key: submit_location_weather(*key) for key in set(keys) if key is not None}
+    lookups = {key: wait_for_weather(future, deadline - time.monotonic()) for key, future in lookups.items()}
+    weather = []
+    for fixture, key in zip(fixtures, keys):
+        if fixture.temperature is not None:
+            weather.append(MatchWeather(fixture.temperature, fixture.weather, None, "fixture"))
+        else:
+            weather.append(NO_WEATHER if key is None else lookups[key])
+    return weather
+
+
+def predict_features(features, use_cache=True):
+    """Predicted attendance in percent for a list of raw feature dicts.
+
+    Rows with a temperature go to the weather model, the rest to the
+    fallback model; each model is encoded and evaluated once. With
+    ``use_cache`` rows predicted before are answered from the process-wide
+    prediction cache. Returns the percentages and a boolean array marking
+    the rows that used weather.
+    """
+    n_rows = len(features)
+    with_weather = np.fromiter(
+        (row["Temperature (°C)"] is not None for row in features), dtype=bool, count=n_rows
+    )
+    percentage = np.empty(n_rows, dtype=np.float64)
+    for name, rows in (("with_weather", with_weather), ("without_weather", ~with_weather)):
+        if not rows.any():
+            continue
+        with timer("encoding"):
+            subset = [row for row, keep in zip(features, rows) if keep]
+            columns = {field: [row[field] for row in subset] for field in subset[0]}
+            X = get_encoder(name).encode_columns(columns, n_rows=len(subset))
+        with timer("prediction"):
+            model = get_compiled_model(name)
+            percentage[rows] = (cached_predict(name, model, X) if use_cache else model.predict(X)) * 100
+    return percentage, with_weather
+
+
+def capacity_and_status(home_teams, percentage):
+    """Absolute attendance capped at capacity, the capacities and the Low/Normal/High status."""
+    capacity = np.array([TEAM_DATA[team]["max_capacity"] for team in home_teams], dtype=np.float64)
+    attendance = np.minimum(np.round(percentage / 100 * capacity), capacity)
+    status = [attendance_status(value, TEAM_DATA[team]) for team, value in zip(home_teams, attendance)]
+    return attendance, capacity, status
+
+
+@timed("engine_predict")
+def predict_fixtures(fixtures, weather=None, fetch_weather=True, use_cache=True, count=True):
+    """``predict_many`` for fixtures that already went through ``as_fixture``
+    and ``check_fixtures``.
+
+    Fixtures without weather are first looked up in the precomputed
+    prediction cube, if a current one exists; only the rest are encoded and
+    run through the models.
+    """
+    if not fixtures:
+        return []
+    if weather is None:
+        weather = resolve_weather(fixtures, fetch_weather)
+    with_weather = np.array([match_weather.temperature is not None for match_weather in weather])
+    percentage = np.full(len(fixtures), np.nan)
+    cube = get_prediction_cube()
+    if cube is not None and not with_weather.all():
+        rows = np.flatnonzero(~with_weather)
+        with timer("cube_lookup"):
+            percentage[rows] = cube.lookup([fixtures[i] for i in rows]) * 100
+    remaining = np.flatnonzero(np.isnan(percentage))
+    if len(remaining):
+        teams = get_league_store().by_team()
+        features = [build_features(fixtures[i], weather[i], teams) for i in remaining]
+        percentage[remaining] = predict_features(features, use_cache)[0]
+    attendance, capacity, status = capacity_and_status([fixture.home_team for fixture in fixtures], percentage)
+    models = ["with_weather" if flag else "without_weather" for flag in with_weather]
+    if count:
+        count_predictions(models)
+    return [
+        Prediction(float(percentage[i]), int(attendance[i]), int(capacity[i]), status[i], models[i], weather[i])
+        for i in range(len(fixtures))
+    ]
+
+
+def predict_many(fixtures, weather=None, fetch_weather=True, use_cache=True, count=True):
+    """Predict every fixture; returns a list of ``Prediction`` in input order.
+
+    ``weather`` optionally supplies a ``MatchWeather`` per fixture and skips
+    the lookup (pass ``NO_WEATHER`` entries to force the fallback model).
+    ``use_cache=False`` bypasses the prediction cache, e.g. for bulk jobs
+    whose rows would only evict the interactive ones. ``count=False`` leaves
+    the predictions out of ``attendance_predictions_total``, for a
+    provisional answer that is replaced right after. Raises ``ValueError``
+    for a fixture the models cannot score (see ``check_fixtures``).
+    """
+    fixtures = [as_fixture(fixture) for fixture in fixtures]
+    check_fixtures(fixtures)
+    return predict_fixtures(fixtures, weather, fetch_weather, use_cache, count)
+
+
+def result_columns(prediction):
+    """A ``Prediction`` as the result columns of a scored fixture table."""
+    return {
+        "Predicted Attendance (%)": round(prediction.percentage, 2),
+        "Predicted Attendance": prediction.attendance,
+        "Max Capacity": prediction.max_capacity,
+        "Attendance Status": prediction.status,
+        "Weather Used": prediction.model == "with_weather",
+    }
+
+
+def predict_attendance(fixture, weather=None, fetch_weather=True, use_cache=True, count=True):
+    """Predict a single fixture; see ``predict_many``."""
+    return predict_many([fixture], None if weather is None else [weather], fetch_weather, use_cache, count)[0]
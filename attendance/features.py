@@ -0,0 +1,133 @@
+"""Compiled feature encoding for the attendance models.
+
+The models were trained on ``pd.get_dummies`` output, so a match is described
+by a handful of raw fields (competition, teams, weather, ...) that expand into
+~90 numeric and one-hot columns. ``FeatureEncoder`` works out once, from the
+model's own column names, which column every numeric field and every
+(categorical field, value) pair lands in, and then fills float32 NumPy rows
+directly instead of building and patching DataFrames.
+"""
+
+import numpy as np
+
+# List of expected columns for the model with weather information
+EXPECTED_COLUMNS = [
+    'Time', 'Ranking Home Team', 'Ranking Away Team', 'Temperature (°C)', 'Month', 'Day',
+    'Goals Scored in Last 5 Games', 'Goals Conceded in Last 5 Games', 'Number of Wins in Last 5 Games',
+    'Competition_Super League', 'Competition_Swiss Cup', 'Competition_UEFA Champions League',
+    'Competition_UEFA Conference League', 'Competition_UEFA Europa League', 'Matchday_10', 'Matchday_11', 'Matchday_12', 'Matchday_13',
+    'Matchday_14', 'Matchday_15', 'Matchday_16', 'Matchday_17', 'Matchday_18', 'Matchday_19',
+    'Matchday_2', 'Matchday_20', 'Matchday_21', 'Matchday_22', 'Matchday_23', 'Matchday_24', 'Matchday_25',
+    'Matchday_26', 'Matchday_27', 'Matchday_28', 'Matchday_29', 'Matchday_3', 'Matchday_30', 'Matchday_31',
+    'Matchday_32', 'Matchday_33', 'Matchday_34', 'Matchday_35', 'Matchday_36', 'Matchday_37', 'Matchday_38',
+    'Matchday_4', 'Matchday_5', 'Matchday_6', 'Matchday_7',
+    'Matchday_8', 'Matchday_9',
+    'Matchday_Group Stage',
+    'Matchday_Knockout Stage', 'Matchday_Qualification', 'Home Team_FC Basel', 'Home Team_FC Lugano',
+    'Home Team_FC Luzern', 'Home Team_FC Sion', 'Home Team_FC St. Gallen', 'Home Team_FC Winterthur',
+    'Home Team_FC Zürich', 'Home Team_Grasshoppers', 'Home Team_Lausanne-Sport', 'Home Team_Servette FC',
+    'Home Team_Yverdon Sport', 'Away Team_FC Basel', 'Away Team_FC Lugano', 'Away Team_FC Luzern',
+    'Away Team_FC Sion', 'Away Team_FC St. Gallen', 'Away Team_FC Winterthur', 'Away Team_FC Zürich',
+    'Away Team_Grasshoppers', 'Away Team_Lausanne-Sport', 'Away Team_Servette FC', 'Away Team_Unknown',
+    'Away Team_Yverdon Sport', 'Weather_Drizzle', 'Weather_Partly cloudy', 'Weather_Rainy',
+    'Weather_Snowy', 'Weekday_Monday', 'Weekday_Saturday', 'Weekday_Sunday', 'Weekday_Thursday',
+    'Weekday_Tuesday', 'Weekday_Wednesday'
+]
+
+# Raw fields that were one-hot encoded during training
+CATEGORICAL_COLUMNS = [
+    "Competition", "Matchday", "Home Team", "Away Team", "Weather", "Weekday"
+]
+
+# Columns the fallback model was trained without
+WEATHER_COLUMNS = [
+    'Weather_Drizzle', 'Weather_Snowy', 'Weather_Partly cloudy',
+    'Temperature (°C)', 'Weather_Rainy'
+]
+
+
+def category_label(value):
+    """Label ``pd.get_dummies`` would have used for ``value`` in a column name."""
+    # Matchdays read from files may arrive as 5.0 but were trained as 5
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value)
+
+
+class FeatureEncoder:
+    """Maps raw match fields straight to positions in a model's input row.
+
+    Values without a column of their own (for example the ``drop_first``
+    baseline categories or an unseen team) leave their one-hot block at zero,
+    exactly like ``get_dummies`` followed by reindexing did.
+    """
+
+    def __init__(self, feature_names, categorical_columns=CATEGORICAL_COLUMNS):
+        self.feature_names = [str(name) for name in feature_names]
+        self.numeric_index = {}
+        self.category_index = {}
+        for position, name in enumerate(self.feature_names):
+            for field in categorical_columns:
+                if name.startswith(field + "_"):
+                    self.category_index[(field, name[len(field) + 1:])] = position
+                    break
+            else:
+                self.numeric_index[name] = position
+        self.categorical_fields = [
+            field for field in categorical_columns
+            if any(key[0] == field for key in self.category_index)
+        ]
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def encode(self, features, out=None):
+        """Encode one match (a mapping of raw fields) into a float32 row.
+
+        When ``out`` is given it is overwritten in place and returned, which
+        lets callers reuse a preallocated buffer.
+        """
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.float32)
+        else:
+            out.fill(0)
+        for name, position in self.numeric_index.items():
+            value = features.get(name)
+            out[position] = np.nan if value is None else value
+        for field in self.categorical_fields:
+            position = self.category_index.get((field, category_label(features.get(field))))
+            if position is not None:
+                out[position] = 1
+        return out
+
+    def encode_columns(self, columns, n_rows=None, out=None):
+        """Encode many matches given column-wise (field -> sequence of values).
+
+        Accepts a DataFrame or a dict of lists and returns a float32 matrix
+        with one row per match.
+        """
+        if n_rows is None:
+            n_rows = len(columns[next(iter(columns))])
+        if out is None:
+            out = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        else:
+            out.fill(0)
+        rows = np.arange(n_rows)
+        for name, position in self.numeric_index.items():
+            if name in columns:
+                values = [np.nan if value is None else value for value in columns[name]]
+                out[:, position] = np.asarray(values, dtype=np.float32)
+            else:
+                out[:, position] = np.nan
+        for field in self.categorical_fields:
+            if field not in columns:
+                continue
+            lookup = self.category_index
+            positions = np.fromiter(
+                (lookup.get((field, category_label(value)), -1) for value in columns[field]),
+                dtype=np.intp, count=n_rows,
+            )
+            known = positions >= 0
+            out[rows[known], positions[known]] = 1
+        return out
@@ -0,0 +1,152 @@
+"""Shared HTTP client for the Open-Meteo forecast API.
+
+Every weather lookup goes through one pooled ``requests.Session`` with
+connect/read timeouts and a bounded number of retries. A circuit breaker
+stops calling the API after repeated failures so that the app falls back to
+the no-weather model immediately instead of waiting on timeouts.
+
+Set ``OPEN_METEO_URL`` to point the client at a local stub server.
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from attendance.metrics import WEATHER_FAILURES
+
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Status codes worth retrying; other client errors (e.g. a date outside the
+# forecast range) are answered immediately and do not count as failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calls after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds a single trial call is let through; its
+    outcome closes the breaker again or re-opens it for another period.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        """True while calls are being short-circuited."""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            return self._trial_running or time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow(self):
+        """Whether a call may proceed right now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self._trial_running and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class WeatherClient:
+    """Pooled, timeout-bounded JSON client with retries and a circuit breaker."""
+
+    def __init__(self, base_url=OPEN_METEO_URL, connect_timeout=2.0, read_timeout=5.0,
+                 max_retries=2, backoff=0.25, max_backoff=2.0, pool_size=10, breaker=None):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, params):
+        """GET ``base_url`` with ``params`` and return the decoded JSON body."""
+        if not self.breaker.allow():
+            WEATHER_FAILURES.inc(reason="circuit_open")
+            raise CircuitOpenError("Weather API circuit breaker is open")
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except requests.Timeout as exception:
+                error, reason = exception, "timeout"
+            except requests.ConnectionError as exception:
+                error, reason = exception, "connection_error"
+            # Anything else that breaks the exchange (a truncated chunked body,
+            # bad content encoding, redirect loops) must count as a failure too,
+            # or a half-open breaker would wait for its trial call forever
+            except requests.RequestException as exception:
+                error, reason = exception, "request_error"
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    # The API answered; a 4xx is the caller's problem, not an outage
+                    self.breaker.record_success()
+                    try:
+                        response.raise_for_status()
+                        return response.json()
+                    except requests.HTTPError:
+                        WEATHER_FAILURES.inc(reason="client_error")
+                        raise
+                    except ValueError:
+                        WEATHER_FAILURES.inc(reason="invalid_response")
+                        raise
+                error = requests.HTTPError(f"{response.status_code} from weather API", response=response)
+                reason = "server_error"
+            if attempt >= self.max_retries:
+                self.breaker.record_failure()
+                WEATHER_FAILURES.inc(reason=reason)
+                raise error
+            # Exponential backoff with jitter, capped at max_backoff
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_weather_client():
+    """Process-wide client shared by all sessions."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WeatherClient()
+    return _client
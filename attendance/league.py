@@ -0,0 +1,109 @@
+"""Current league standings, indexed by team.
+
+``new_league_data.csv`` is parsed once per process into immutable
+``TeamRecord`` tuples keyed by team name. Every access checks the file's
+modification time, so updating the CSV takes effect on the next rerun
+without a restart.
+"""
+
+import csv
+import os
+import threading
+from collections import namedtuple
+
+from attendance.models import BASE_DIR
+
+LEAGUE_DATA_PATH = os.path.join(BASE_DIR, "new_league_data.csv")
+
+# Results of the last five games, most recent first
+RESULT_COLUMNS = [
+    "Last_1_Game_Result", "Last_2_Game_Result", "Last_3_Game_Result",
+    "Last_4_Game_Result", "Last_5_Game_Result",
+]
+
+TeamRecord = namedtuple("TeamRecord", [
+    "team", "ranking", "goals_scored_last_5", "goals_conceded_last_5", "wins_last_5",
+    "last_5_results", "total_goals_scored", "total_goals_conceded", "goal_difference",
+    "games_played", "points",
+])
+
+
+def _to_record(row):
+    return TeamRecord(
+        team=row["Team"],
+        ranking=int(row["Ranking"]),
+        goals_scored_last_5=int(row["Goals_Scored_in_Last_5_Games"]),
+        goals_conceded_last_5=int(row["Goals_Conceded_in_Last_5_Games"]),
+        wins_last_5=int(row["Number_of_Wins_in_Last_5_Games"]),
+        last_5_results=tuple(row[column] for column in RESULT_COLUMNS),
+        total_goals_scored=int(row["Total_Goals_Scored"]),
+        total_goals_conceded=int(row["Total_Goals_Conceded"]),
+        goal_difference=int(row["Goal_Difference"]),
+        games_played=int(row["Games_Played"]),
+        points=int(row["Points"]),
+    )
+
+
+class LeagueStore:
+    """Team lookups in O(1), reloaded whenever the CSV file changes."""
+
+    def __init__(self, path=LEAGUE_DATA_PATH):
+        self.path = path
+        # (file version, records by team, records by ranking), replaced as a whole
+        self._state = (None, {}, ())
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Modification time of the loaded file, ``None`` before the first load."""
+        return self._state[0]
+
+    def _refresh(self):
+        version = os.stat(self.path).st_mtime_ns
+        if version == self.version:
+            return self._state
+        with self._lock:
+            if version != self.version:
+                with open(self.path, newline="", encoding="utf-8") as file:
+                    records = {row["Team"]: _to_record(row) for row in csv.DictReader(file)}
+                ranked = tuple(sorted(records.values(), key=lambda record: record.ranking))
+                self._state = (version, records, ranked)
+            return self._state
+
+    def get(self, team):
+        """The ``TeamRecord`` for ``team``, or ``None`` if it is not in the table."""
+        return self._refresh()[1].get(team)
+
+    def by_team(self):
+        """Mapping of team name to ``TeamRecord`` for the current file version.
+
+        Checks the file once, for callers looking up many teams in a row.
+        Do not modify it.
+        """
+        return self._refresh()[1]
+
+    def records(self):
+        """All teams ordered by ranking."""
+        return list(self._refresh()[2])
+
+    def snapshot(self):
+        """``(version, records)`` of one file version, records ordered by ranking.
+
+        For callers caching something derived from the records by version.
+        """
+        version, _, ranked = self._refresh()
+        return version, ranked
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_league_store():
+    """Process-wide league store shared by all sessions."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LeagueStore()
+    return _store
@@ -0,0 +1,110 @@
+"""HTML rendering of the league table shown under the prediction.
+
+The table body only changes when ``new_league_data.csv`` does, so it is
+rendered once per league-data version and cached. The home and away teams
+are highlighted per request with a small CSS block that targets each row's
+team class, without regenerating any rows.
+"""
+
+import html
+import re
+import threading
+import unicodedata
+
+# Map result to an emoji
+RESULT_ICONS = {"Win": "✅", "Lose": "❌", "Tie": "➖"}
+
+# Displayed columns and their headers, in order
+TABLE_COLUMNS = {
+    "Ranking": "🏅 Ranking",
+    "Team": "🏟️ Team",
+    "Points": "🎯 Points",
+    "Games_Played": "🕒 Games Played",
+    "Total_Goals_Scored": "⚽ Total Goals Scored",
+    "Total_Goals_Conceded": "🛡️ Total Goals Conceded",
+    "Last_5_Games_Icons": "📊 Last 5 Games",
+}
+
+# Define CSS for styling the table
+TABLE_CSS = """
+<style>
+    table {
+        width: 100%;
+        border-collapse: collapse;
+        border: 1px solid #ddd;
+        font-family: Arial, sans-serif;
+        margin: 20px 0;
+        border-radius: 8px;  /* Abgeflachte Ecken */
+        overflow: hidden;    /* Verhindert Überlauf */
+    }
+    th, td {
+        border: 1px solid #ddd;
+        padding: 8px;
+        text-align: center;
+    }
+    th {
+        background-color: #f4f4f4;
+        font-weight: bold;
+        font-size: 14px;
+        color: #333;
+    }
+    tr:nth-child(even) {
+        background-color: #f9f9f9;
+    }
+    tr:nth-child(odd) {
+        background-color: #ffffff;
+    }
+    tr:hover {
+        background-color: #f1f1f1;
+    }
+    td {
+        font-size: 13px;
+        color: #555;
+    }
+</style>
+"""
+
+_rendered = {}
+_lock = threading.Lock()
+
+
+def team_css_class(team):
+    """CSS class marking the table row of ``team``, e.g. ``team-fc-zurich``."""
+    ascii_name = unicodedata.normalize("NFKD", team).encode("ascii", "ignore").decode()
+    return "team-" + re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+def render_table_body(records):
+    """Static table HTML (CSS, header and one row per team) for ``TeamRecord`` rows."""
+    rows = []
+    for record in sorted(records, key=lambda record: record.ranking):
+        # Map each of the last 5 results to its icon
+        icons = "".join(RESULT_ICONS.get(result, "❓") for result in record.last_5_results)
+        values = (record.ranking, record.team, record.points, record.games_played,
+                  record.total_goals_scored, record.total_goals_conceded, icons)
+        cells = "".join(f"<td>{html.escape(str(value))}</td>" for value in values)
+        rows.append(f'<tr class="{team_css_class(record.team)}">{cells}</tr>')
+    header = "".join(f"<th>{title}</th>" for title in TABLE_COLUMNS.values())
+    return f"{TABLE_CSS}<table><thead><tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody></table>"
+
+
+def highlight_css(home_team, away_team):
+    """Per-request CSS highlighting the rows of the selected teams."""
+    return (
+        "<style>"
+        f"tr.{team_css_class(home_team)} {{ background-color: rgba(0, 123, 255, 0.4) !important; font-weight: bold !important; }}"
+        f"tr.{team_css_class(away_team)} {{ background-color: rgba(0, 123, 255, 0.15) !important; }}"
+        "</style>"
+    )
+
+
+def league_table_html(league_store, home_team, away_team):
+    """League table HTML with the home and away rows highlighted."""
+    version, records = league_store.snapshot()
+    body = _rendered.get(version)
+    if body is None:
+        body = render_table_body(records)
+        with _lock:
+            _rendered.clear()
+            _rendered[version] = body
+    return highlight_css(home_team, away_team) + body
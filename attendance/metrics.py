@@ -0,0 +1,234 @@
+"""Prometheus metrics in the text exposition format.
+
+    ATTENDANCE_METRICS_PORT=9108 streamlit run app_v4_final.py
+    curl -s http://127.0.0.1:9108/metrics
+
+Exported series:
+
+* ``attendance_prediction_latency_seconds{entrypoint}``: histogram of the
+  end-to-end time to answer a prediction, from the "Predict" click to the
+  rendered result in the app (``app``) or per ``POST /predict`` in the HTTP
+  service (``http``);
+* ``attendance_weather_fetch_latency_seconds{request}``: histogram of calls
+  to the forecast API, ``single`` (one stadium and day) or ``bulk``;
+* ``attendance_predictions_total{model}``: fixtures predicted by the
+  ``with_weather`` and the ``without_weather`` model;
+* ``attendance_weather_api_failures_total{reason}``: forecast requests that
+  failed after retries, or were short-circuited by the open breaker;
+* ``attendance_cache_hits_total{cache}`` / ``attendance_cache_misses_total{cache}``
+  for the ``weather`` and the ``prediction`` cache;
+* ``attendance_weather_circuit_open``: 1 while the circuit breaker is open.
+
+All values are per process. The histograms are fed by the ``timing``
+stages of the same name, so every timed section costs one extra bucket
+update at most. ``start_metrics_server()`` serves ``/metrics`` on
+``ATTENDANCE_METRICS_PORT`` (unset: no exporter); the prediction service
+also answers ``GET /metrics`` on its own port.
+"""
+
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from attendance.timing import add_observer
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = int(os.environ.get("ATTENDANCE_METRICS_PORT") or 0) or None
+METRICS_HOST = os.environ.get("ATTENDANCE_METRICS_HOST", "127.0.0.1")
+
+# Upper bounds in seconds, from a cached prediction to a slow forecast request
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter:
+    """Monotonic count per combination of label values."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                     for key, value in sorted(values.items()))
+        return lines
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per combination of label values."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per bucket (the last one is +Inf), then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(values[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+PREDICTION_LATENCY = Histogram(
+    "attendance_prediction_latency_seconds",
+    "End-to-end time to answer a prediction request.", ["entrypoint"],
+)
+WEATHER_FETCH_LATENCY = Histogram(
+    "attendance_weather_fetch_latency_seconds",
+    "Duration of forecast API calls, including retries.", ["request"],
+)
+PREDICTIONS = Counter(
+    "attendance_predictions_total",
+    "Fixtures predicted, by the model that was used.", ["model"],
+)
+WEATHER_FAILURES = Counter(
+    "attendance_weather_api_failures_total",
+    "Forecast API requests that failed or were short-circuited.", ["reason"],
+)
+
+# timing stage -> histogram and labels it feeds
+STAGE_HISTOGRAMS = {
+    "app_prediction": (PREDICTION_LATENCY, {"entrypoint": "app"}),
+    "http_prediction": (PREDICTION_LATENCY, {"entrypoint": "http"}),
+    "weather_fetch": (WEATHER_FETCH_LATENCY, {"request": "single"}),
+    "weather_bulk_fetch": (WEATHER_FETCH_LATENCY, {"request": "bulk"}),
+}
+
+for _stage, (_histogram, _labels) in STAGE_HISTOGRAMS.items():
+    add_observer(_stage, lambda seconds, histogram=_histogram, labels=_labels: histogram.observe(seconds, **labels))
+
+
+def count_predictions(models):
+    """Count one prediction per entry of ``models`` (model names)."""
+    for model in set(models):
+        PREDICTIONS.inc(models.count(model), model=model)
+
+
+def _cache_lines():
+    # The caches keep their own counters; they are read at scrape time.
+    # Imported here because the weather modules import this one
+    from attendance.http_client import get_weather_client
+    from attendance.prediction_cache import get_prediction_cache
+    from attendance.weather import weather_stats
+
+    weather = weather_stats()["cache"]
+    prediction = get_prediction_cache().stats()
+    counts = {
+        "weather": (weather["hits"] + weather["stale_hits"], weather["misses"]),
+        "prediction": (prediction["hits"], prediction["misses"]),
+    }
+    lines = []
+    for index, (name, documentation) in enumerate([
+        ("attendance_cache_hits_total", "Cache lookups answered from the cache (weather: fresh or stale)."),
+        ("attendance_cache_misses_total", "Cache lookups that had to compute or fetch the value."),
+    ]):
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{cache="{cache}"}} {values[index]}' for cache, values in counts.items()]
+    lines += [
+        "# HELP attendance_weather_circuit_open Whether forecast requests are currently short-circuited.",
+        "# TYPE attendance_weather_circuit_open gauge",
+        f"attendance_weather_circuit_open {int(get_weather_client().breaker.is_open)}",
+    ]
+    return lines
+
+
+def exposition():
+    """Every metric of this process in the Prometheus text format."""
+    lines = []
+    for metric in (PREDICTION_LATENCY, WEATHER_FETCH_LATENCY, PREDICTIONS, WEATHER_FAILURES):
+        lines.extend(metric.expose())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve ``/metrics`` on a background thread, once per process.
+
+    Returns the server, or None if no port is configured or it is taken
+    (the app keeps running without the exporter).
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError as error:
+                # Do not try again on every rerun
+                logger.warning("Metrics exporter not started on %s:%d: %s", host, port, error)
+                _server = False
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return _server or None
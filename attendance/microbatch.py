@@ -0,0 +1,112 @@
+"""Dynamic micro-batching of concurrent requests.
+
+Callers hand in small lists of items from many threads; a single worker
+thread collects them until either ``max_batch_size`` items are waiting or
+``max_latency`` seconds have passed since the first one arrived, runs the
+batch function once on everything collected and hands every caller its own
+slice of the results.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Groups ``submit`` calls into one call of ``function(items) -> results``.
+
+    ``function`` must return one result per item, in order. A single request
+    larger than ``max_batch_size`` is run as a batch of its own.
+    """
+
+    def __init__(self, function, max_batch_size=256, max_latency=0.002, name="micro-batch"):
+        self.function = function
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        """Queue ``items`` and return a ``Future`` for their list of results."""
+        future = Future()
+        self._queue.put((list(items), future))
+        return future
+
+    def _collect(self):
+        # Block for the first request, then gather more until full or out of time
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch, size = [first], len(first[0])
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._execute(batch)
+
+    def _execute(self, batch):
+        items = [item for request_items, _ in batch for item in request_items]
+        with self._lock:
+            self.requests += len(batch)
+            self.items += len(items)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(items))
+        try:
+            results = self.function(items) if items else []
+        except Exception as error:
+            with self._lock:
+                self.failed += 1
+            logger.warning("Micro-batch of %d items failed", len(items), exc_info=True)
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        offset = 0
+        for request_items, future in batch:
+            future.set_result(results[offset:offset + len(request_items)])
+            offset += len(request_items)
+
+    def close(self):
+        """Stop the worker after the requests already queued."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "items": self.items,
+                "batches": self.batches,
+                "largest_batch": self.largest_batch,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "failed": self.failed,
+            }
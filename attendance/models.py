@@ -0,0 +1,112 @@
+"""Process-wide registry for the pickled attendance models.
+
+Streamlit re-executes the app script on every widget change, but imported
+modules are only initialised once per server process. Keeping the loaded
+models here means each ``.sav`` file is unpickled at most once and shared by
+every session, and the fallback model is only loaded when it is first needed.
+
+Compiled tree arrays are also written to the cache directory, keyed by a hash
+of the ``.sav`` file. A fresh process reads them back directly, so serving
+predictions never needs to import XGBoost or scikit-learn.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import zipfile
+
+from attendance.features import FeatureEncoder
+from attendance.tree_inference import CompiledEnsemble
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get("ATTENDANCE_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+# Model name -> pickled estimator on disk
+MODEL_PATHS = {
+    "with_weather": os.path.join(BASE_DIR, "finalized_model_with_weather.sav"),
+    "without_weather": os.path.join(BASE_DIR, "finalized_model_without_weather.sav"),
+}
+
+_models = {}
+_compiled = {}
+_encoders = {}
+_versions = {}
+# Re-entrant because compiling a model loads it while holding the lock
+_lock = threading.RLock()
+
+
+# Function to load a model using pickle
+def load_model(model_path):
+    with open(model_path, "rb") as file:
+        return pickle.load(file)
+
+
+def get_model(name):
+    """Return the model registered under ``name``, loading it on first use."""
+    model = _models.get(name)
+    if model is None:
+        with _lock:
+            # Another session may have finished loading while we waited
+            model = _models.get(name)
+            if model is None:
+                model = load_model(MODEL_PATHS[name])
+                _models[name] = model
+    return model
+
+
+def model_version(name):
+    """Short content hash of the ``.sav`` file behind model ``name``."""
+    version = _versions.get(name)
+    if version is None:
+        with open(MODEL_PATHS[name], "rb") as file:
+            version = hashlib.sha256(file.read()).hexdigest()[:16]
+        _versions[name] = version
+    return version
+
+
+def _compiled_cache_path(name):
+    return os.path.join(CACHE_DIR, "compiled", f"{name}-{model_version(name)}.npz")
+
+
+def _compile(name):
+    # Read the compiled arrays from disk if this exact model was compiled
+    # before, otherwise unpickle and compile it and write the arrays back
+    path = _compiled_cache_path(name)
+    try:
+        return CompiledEnsemble.load(path)
+    # Missing, truncated or from an older layout: compile it again
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        pass
+    compiled = CompiledEnsemble.from_model(get_model(name))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compiled.save(path)
+    except OSError:
+        pass
+    return compiled
+
+
+def get_compiled_model(name):
+    """Return the array-backed ensemble for ``name``, compiling it on first use."""
+    compiled = _compiled.get(name)
+    if compiled is None:
+        with _lock:
+            compiled = _compiled.get(name)
+            if compiled is None:
+                compiled = _compile(name)
+                _compiled[name] = compiled
+    return compiled
+
+
+def get_encoder(name):
+    """Return the feature encoder compiled from the input layout of model ``name``."""
+    encoder = _encoders.get(name)
+    if encoder is None:
+        feature_names = get_compiled_model(name).feature_names
+        with _lock:
+            encoder = _encoders.get(name)
+            if encoder is None:
+                encoder = FeatureEncoder(feature_names)
+                _encoders[name] = encoder
+    return encoder
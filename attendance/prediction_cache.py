@@ -0,0 +1,106 @@
+"""Process-wide LRU cache of model predictions.
+
+Planners flip between the same handful of fixtures, and every rerun would
+otherwise evaluate all trees again. Predictions are keyed by a digest of the
+encoded float32 feature row together with the model's content hash, so any
+input that encodes identically hits the cache and a retrained ``.sav`` file
+never serves stale values.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from attendance.models import model_version
+
+# Entries kept before the least recently used ones are evicted
+MAX_ENTRIES = 4096
+
+
+def row_keys(name, X):
+    """Cache key per row of the encoded matrix ``X`` for model ``name``."""
+    version = model_version(name).encode("ascii")
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16, key=version).digest() for row in X]
+
+
+class PredictionCache:
+    """Bounded LRU mapping of row keys to predicted values."""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """Cached value per key, ``None`` where there is none."""
+        values = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                values.append(value)
+        return values
+
+    def put_many(self, keys, values):
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = float(value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """Process-wide prediction cache shared by all sessions."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
+
+
+def cached_predict(name, model, X):
+    """``model.predict(X)``, evaluating only the rows not already cached."""
+    cache = get_prediction_cache()
+    keys = row_keys(name, X)
+    cached = cache.get_many(keys)
+    missing = [i for i, value in enumerate(cached) if value is None]
+    predictions = np.array([np.nan if value is None else value for value in cached], dtype=np.float32)
+    if missing:
+        computed = model.predict(X[missing])
+        predictions[missing] = computed
+        cache.put_many([keys[i] for i in missing], computed)
+    return predictions
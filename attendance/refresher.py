@@ -0,0 +1,50 @@
+"""Background refreshing of expired cache entries (stale-while-revalidate)."""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """Runs refresh jobs on a small thread pool, at most one per key.
+
+    ``max_workers`` caps how many refreshes run at once and ``max_pending``
+    how many may be queued; further requests are dropped until the queue
+    drains, since the stale value keeps being served in the meantime.
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, name="refresh"):
+        self.max_pending = max_pending
+        self.scheduled = 0
+        self.dropped = 0
+        self.failed = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    def schedule(self, key, function, *args):
+        """Queue ``function(*args)`` unless ``key`` is already being refreshed."""
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.add(key)
+            self.scheduled += 1
+        self._executor.submit(self._run, key, function, args)
+        return True
+
+    def _run(self, key, function, args):
+        try:
+            function(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            logger.warning("Background refresh of %s failed", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self):
+        return {"scheduled": self.scheduled, "dropped": self.dropped, "failed": self.failed}
@@ -0,0 +1,175 @@
+"""Local HTTP/JSON prediction service.
+
+    python -m attendance.server --port 8600 --max-batch 256 --max-latency-ms 2
+
+``POST /predict`` takes one fixture (a JSON object with the app's column
+names, as for ``attendance.cli``) or a list of them and answers with one
+result object per fixture, or ``{"error": ...}`` and status 400 if a fixture
+cannot be scored. ``GET /health`` reports the batching, prediction cache and
+timing statistics, ``GET /metrics`` the Prometheus metrics of ``attendance.metrics``.
+
+Requests are validated on their own handler thread and then scored by a
+``MicroBatcher``: fixtures from concurrent requests arriving within the
+latency window are encoded and predicted together, so under load the cost
+per request is dominated by vectorised inference.
+"""
+
+import argparse
+import json
+import logging
+import socket
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from attendance import metrics
+from attendance.engine import as_fixture, check_fixtures, predict_fixtures, resolve_weather, result_columns
+from attendance.microbatch import MicroBatcher
+from attendance.models import get_compiled_model
+from attendance.prediction_cache import get_prediction_cache
+from attendance.timing import record, timing_snapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8600
+# Longest a request waits for the batch it is in to be scored
+REQUEST_TIMEOUT = 30.0
+
+
+def prediction_response(prediction):
+    """JSON-ready result for one fixture."""
+    return {
+        **result_columns(prediction),
+        "Model": prediction.model,
+        "Weather": prediction.weather.condition,
+        "Temperature (°C)": prediction.weather.temperature,
+    }
+
+
+def score_batch(items):
+    """Batch function for the ``MicroBatcher``: items are (fixture, weather) pairs."""
+    fixtures = [fixture for fixture, _ in items]
+    weather = [match_weather for _, match_weather in items]
+    return [prediction_response(prediction) for prediction in predict_fixtures(fixtures, weather)]
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this every
+        # keep-alive response waits for the client's delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "batching": self.server.batcher.stats(),
+            "prediction_cache": get_prediction_cache().stats(),
+            "timings": timing_snapshot(),
+        })
+
+    def do_POST(self):
+        started = time.perf_counter()
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"null")
+            single = isinstance(payload, dict)
+            if not single and not isinstance(payload, list):
+                raise ValueError("Expected a fixture object or a list of fixtures")
+            fixtures = [as_fixture(fixture) for fixture in ([payload] if single else payload)]
+            check_fixtures(fixtures)
+        except (ValueError, TypeError, AttributeError) as error:
+            self._send_json(400, {"error": str(error)})
+            return
+
+        weather = resolve_weather(fixtures, fetch_weather=self.server.fetch_weather)
+        try:
+            results = self.server.batcher.submit(zip(fixtures, weather)).result(timeout=REQUEST_TIMEOUT)
+        except Exception as error:
+            logger.warning("Prediction request failed", exc_info=True)
+            self._send_json(500, {"error": str(error)})
+            return
+        self._send_json(200, results[0] if single else results)
+        record("http_prediction", time.perf_counter() - started)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for bursts of concurrent clients connecting at once
+    request_queue_size = 128
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, max_batch_size=256, max_latency=0.002,
+                fetch_weather=False):
+    """A ready-to-serve ``ThreadingHTTPServer`` with its own ``MicroBatcher``."""
+    # Load both models before the first request instead of inside a batch
+    for name in ("with_weather", "without_weather"):
+        get_compiled_model(name)
+    server = PredictionServer((host, port), PredictionHandler)
+    server.batcher = MicroBatcher(score_batch, max_batch_size=max_batch_size, max_latency=max_latency,
+                                  name="prediction-batch")
+    server.fetch_weather = fetch_weather
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m attendance.server", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="most fixtures scored in one batch (default: 256)")
+    parser.add_argument("--max-latency-ms", type=float, default=2.0,
+                        help="how long the first request of a batch waits for others (default: 2)")
+    parser.add_argument("--fetch-weather", action="store_true",
+                        help="look up the forecast for fixtures without weather in the request")
+    parser.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT,
+                        help="also serve /metrics on this port (default: ATTENDANCE_METRICS_PORT, "
+                             "otherwise only on the service port)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    server = make_server(args.host, args.port, max(1, args.max_batch), args.max_latency_ms / 1000,
+                         args.fetch_weather)
+    logger.info("Serving predictions on http://%s:%d/predict", args.host, args.port)
+    if metrics.start_metrics_server(args.metrics_port, args.host):
+        logger.info("Serving metrics on http://%s:%d/metrics", args.host, args.metrics_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
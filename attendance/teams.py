@@ -0,0 +1,71 @@
+"""Static reference data for the Swiss Super League clubs."""
+
+# Define available teams and competitions
+AVAILABLE_HOME_TEAMS = ['FC Sion', 'FC St. Gallen', 'FC Winterthur', 'FC Zürich',
+                        'BSC Young Boys', 'FC Luzern', 'Lausanne-Sport', 'Servette FC',
+                        'FC Basel', 'FC Lugano', 'Grasshoppers', 'Yverdon Sport']
+AVAILABLE_COMPETITIONS = ['Super League', 'UEFA Conference League', 'Swiss Cup',
+                          'UEFA Europa League', 'UEFA Champions League']
+
+# Stadium locations, keyed by the stadium names used in football_results-3.csv
+STADIUM_LOCATIONS = {
+    'Stade Tourbillon': {'latitude': 46.233333, 'longitude': 7.376389},
+    'kybunpark': {'latitude': 47.408333, 'longitude': 9.310278},
+    'Stadion Schützenwiese': {'latitude': 47.505278, 'longitude': 8.724167},
+    'Letzigrund': {'latitude': 47.382778, 'longitude': 8.504167},
+    'Wankdorf Stadium': {'latitude': 46.963056, 'longitude': 7.464722},
+    'Swissporarena': {'latitude': 47.035833, 'longitude': 8.310833},
+    'Stade de la Tuilière': {'latitude': 46.537778, 'longitude': 6.614444},
+    'Stade de Genève': {'latitude': 46.1875, 'longitude': 6.128333},
+    'St. Jakob-Park': {'latitude': 47.541389, 'longitude': 7.620833},
+    'Cornaredo Stadium': {'latitude': 46.0225, 'longitude': 8.960278},
+    'Stade Municipal': {'latitude': 46.778056, 'longitude': 6.641111},
+}
+
+# Home ground of every club; clubs sharing a stadium share its location
+TEAM_LOCATIONS = {
+    'FC Sion': 'Stade Tourbillon',
+    'FC St. Gallen': 'kybunpark',
+    'FC Winterthur': 'Stadion Schützenwiese',
+    'FC Zürich': 'Letzigrund',
+    'BSC Young Boys': 'Wankdorf Stadium',
+    'FC Luzern': 'Swissporarena',
+    'Lausanne-Sport': 'Stade de la Tuilière',
+    'Servette FC': 'Stade de Genève',
+    'FC Basel': 'St. Jakob-Park',
+    'FC Lugano': 'Cornaredo Stadium',
+    'Grasshoppers': 'Letzigrund',
+    'Yverdon Sport': 'Stade Municipal',
+}
+
+# Define team-specific data, including stadium capacity and attendance thresholds
+TEAM_DATA = {
+    "BSC Young Boys": {"max_capacity": 31783, "attendance_30th_percentile": 25282.1, "attendance_70th_percentile": 31120.0},
+    "FC Basel": {"max_capacity": 38512, "attendance_30th_percentile": 19527.0, "attendance_70th_percentile": 22666.5},
+    "FC Lugano": {"max_capacity": 6330, "attendance_30th_percentile": 2843.5, "attendance_70th_percentile": 3509.6},
+    "FC Luzern": {"max_capacity": 16800, "attendance_30th_percentile": 10105.5, "attendance_70th_percentile": 13171.9},
+    "FC Sion": {"max_capacity": 16232, "attendance_30th_percentile": 6500.0, "attendance_70th_percentile": 9480.0},
+    "FC St. Gallen": {"max_capacity": 20029, "attendance_30th_percentile": 15683.8, "attendance_70th_percentile": 18482.3},
+    "FC Winterthur": {"max_capacity": 8550, "attendance_30th_percentile": 5100.0, "attendance_70th_percentile": 8400.0},
+    "FC Zürich": {"max_capacity": 26104, "attendance_30th_percentile": 10870.0, "attendance_70th_percentile": 15393.0},
+    "Grasshoppers": {"max_capacity": 26104, "attendance_30th_percentile": 4049.6, "attendance_70th_percentile": 5879.0},
+    "Lausanne-Sport": {"max_capacity": 12544, "attendance_30th_percentile": 3773.6, "attendance_70th_percentile": 5728.0},
+    "Servette FC": {"max_capacity": 30084, "attendance_30th_percentile": 6076.6, "attendance_70th_percentile": 10860.1},
+    "Yverdon Sport": {"max_capacity": 6600, "attendance_30th_percentile": 712.6, "attendance_70th_percentile": 2400.0}
+}
+
+# Attendance status -> label shown in the app
+STATUS_LABELS = {
+    "Low": "Low attendance 🚶‍♂️",
+    "Normal": "Normal attendance ⚖️",
+    "High": "High attendance 🏟️",
+}
+
+
+def attendance_status(predicted_attendance, team_info):
+    """Classify an absolute attendance against the club's 30th/70th percentiles."""
+    if predicted_attendance < team_info["attendance_30th_percentile"]:
+        return "Low"
+    if predicted_attendance > team_info["attendance_70th_percentile"]:
+        return "High"
+    return "Normal"
@@ -0,0 +1,155 @@
+"""Lightweight timers for the hot path.
+
+``timer("stage")`` (a context manager) and ``@timed("stage")`` record how
+long a section took into a per-process rolling window of recent samples.
+Streamlit sessions, the CLI and the HTTP service all share that window.
+Recording costs a ``perf_counter`` call and a locked ``deque.append``.
+
+``timing_snapshot()`` summarises every stage (count, mean and
+p50/p95/p99/max in ms over the window). The app shows it in an opt-in
+sidebar panel. ``start_log_reporter()`` also writes it as one JSON log line
+every ``ATTENDANCE_TIMING_LOG_INTERVAL`` seconds (default 300; 0 disables
+it).
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Samples kept per stage for the percentiles
+WINDOW = 1024
+LOG_INTERVAL = float(os.environ.get("ATTENDANCE_TIMING_LOG_INTERVAL", 300))
+
+
+class RollingHistogram:
+    """The last ``window`` durations of one stage plus an all-time count."""
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        with self._lock:
+            values = np.array(self.samples) * 1000
+            count, total = self.count, self.total
+        if not len(values):
+            return {"count": count}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": count,
+            "mean_ms": round(total * 1000 / count, 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def get_histogram(stage):
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(stage, RollingHistogram())
+    return histogram
+
+
+# stage -> callbacks that also receive every duration (e.g. metrics histograms)
+_observers = {}
+
+
+def add_observer(stage, callback):
+    """Call ``callback(seconds)`` for every duration recorded for ``stage``."""
+    with _histograms_lock:
+        _observers.setdefault(stage, []).append(callback)
+
+
+def record(stage, seconds):
+    """Add one duration for ``stage``."""
+    get_histogram(stage).record(seconds)
+    for callback in _observers.get(stage, ()):
+        callback(seconds)
+
+
+@contextmanager
+def timer(stage):
+    """Time the ``with`` block as one sample of ``stage`` (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """Decorator form of ``timer``."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timing_snapshot():
+    """Summary per stage, sorted by stage name."""
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {stage: histograms[stage].summary() for stage in sorted(histograms)}
+
+
+_reporter = None
+_reporter_lock = threading.Lock()
+
+
+def _report_forever(interval):
+    last_counts = {}
+    while True:
+        time.sleep(interval)
+        snapshot = timing_snapshot()
+        counts = {stage: summary["count"] for stage, summary in snapshot.items()}
+        # Stay quiet while nothing happens
+        if counts != last_counts:
+            logger.info(json.dumps({"event": "timings", "pid": os.getpid(), "stages": snapshot}))
+            last_counts = counts
+
+
+def start_log_reporter(interval=LOG_INTERVAL):
+    """Start the periodic JSON log line once per process; returns whether it runs."""
+    global _reporter
+    if interval <= 0:
+        return False
+    with _reporter_lock:
+        if _reporter is None:
+            # The report is INFO; Streamlit leaves the root logger at WARNING
+            if logger.level == logging.NOTSET:
+                logger.setLevel(logging.INFO)
+            if not logger.hasHandlers():
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+                logger.addHandler(handler)
+            _reporter = threading.Thread(target=_report_forever, args=(interval,),
+                                         name="timing-reporter", daemon=True)
+            _reporter.start()
+    return True
@@ -0,0 +1,303 @@
+"""Train both attendance models from ``football_results-3.csv``.
+
+    python -m attendance.training
+    python -m attendance.training --candidates 40 --folds 5 --jobs 8 --seed 42 --output-dir /tmp/models
+
+The match history is reduced to what the app can ask about. Only the
+competitions in ``AVAILABLE_COMPETITIONS`` are kept; qualifying competitions
+count as their main competition with matchday ``Qualification``. Cup and
+European rounds are grouped into ``Group Stage`` and ``Knockout Stage``.
+Opponents without a home-team column become ``Unknown`` with ranking 0, as
+in ``engine.build_features``. Each match is then encoded with
+``FeatureEncoder`` into exactly the columns of ``EXPECTED_COLUMNS`` (minus
+``WEATHER_COLUMNS`` for the fallback model), so training and serving share
+one layout.
+
+For each model a seeded random sample of XGBoost hyperparameters is scored
+with k-fold cross-validation. Every (candidate, fold) fit runs as its own
+task in a process pool and stops early on the held-out fold. The candidate
+with the lowest mean RMSE is refit on all matches with the mean best round
+count. The ``.sav`` files are written atomically under the names in
+``models.MODEL_PATHS``, together with ``training_report.json``, to
+``--output-dir`` (default ``<cache dir>/training``). The served models are
+never touched. Replacing them is a deliberate step after reviewing the
+report:
+
+    cp .cache/training/finalized_model_*.sav .
+
+Models, caches and the prediction cube key on the file hash, so the app
+picks up the replaced models after a restart without serving stale
+predictions.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from attendance.features import EXPECTED_COLUMNS, WEATHER_COLUMNS, FeatureEncoder
+from attendance.models import BASE_DIR, CACHE_DIR, MODEL_PATHS
+from attendance.teams import AVAILABLE_COMPETITIONS, AVAILABLE_HOME_TEAMS
+
+logger = logging.getLogger(__name__)
+
+TRAINING_DATA_PATH = os.path.join(BASE_DIR, "football_results-3.csv")
+# Trained models land here, not next to the served ones
+TRAINING_OUTPUT_DIR = os.path.join(CACHE_DIR, "training")
+
+# Model name -> input columns, in the order the encoder fills them
+MODEL_FEATURES = {
+    "with_weather": EXPECTED_COLUMNS,
+    "without_weather": [column for column in EXPECTED_COLUMNS if column not in WEATHER_COLUMNS],
+}
+
+TARGET_COLUMN = "PercentageAttendance"
+
+# Qualifying rounds are predicted as the main competition
+COMPETITION_ALIASES = {
+    "UEFA Champions League Qualifying": "UEFA Champions League",
+    "UEFA Conference League Qualifiers": "UEFA Conference League",
+    "UEFA Europa League Qualifying": "UEFA Europa League",
+}
+
+# Search space; candidates are drawn from it with the seed
+PARAMETER_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "min_child_weight": [1, 2, 4, 8],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.5, 0.7, 0.85, 1.0],
+    "reg_lambda": [0.5, 1.0, 2.0, 5.0],
+    "gamma": [0.0, 0.001, 0.005],
+}
+
+MAX_ROUNDS = 2000
+EARLY_STOPPING_ROUNDS = 50
+
+
+def normalise_matchday(matchday):
+    """League matchdays stay numbers; cup and European rounds become stages."""
+    matchday = str(matchday)
+    if matchday.isdigit():
+        return matchday
+    if matchday.startswith("Group"):
+        return "Group Stage"
+    return "Knockout Stage"
+
+
+def prepare_matches(frame):
+    """The matches the app can predict, with fields as the engine produces them."""
+    frame = frame.copy()
+    qualifying = frame["Competition"].isin(COMPETITION_ALIASES)
+    frame["Competition"] = frame["Competition"].replace(COMPETITION_ALIASES)
+    frame = frame[frame["Competition"].isin(AVAILABLE_COMPETITIONS)
+                  & frame["Home Team"].isin(AVAILABLE_HOME_TEAMS)].copy()
+    qualifying = qualifying.loc[frame.index]
+
+    frame["Matchday"] = [
+        "Qualification" if is_qualifying else normalise_matchday(matchday)
+        for matchday, is_qualifying in zip(frame["Matchday"], qualifying)
+    ]
+    # The app only offers league clubs as opponents, and none in Europe
+    unknown = ~frame["Away Team"].isin(AVAILABLE_HOME_TEAMS) | frame["Competition"].str.startswith("UEFA")
+    frame.loc[unknown, "Away Team"] = "Unknown"
+    frame.loc[unknown, "Ranking Away Team"] = 0
+    # Predictions are capped at the capacity anyway; a few rows report more
+    frame[TARGET_COLUMN] = frame[TARGET_COLUMN].clip(upper=1.0)
+    return frame.reset_index(drop=True)
+
+
+def feature_matrix(matches, feature_names):
+    """``matches`` encoded into the columns ``feature_names`` as float32."""
+    return FeatureEncoder(feature_names).encode_columns(matches, len(matches))
+
+
+def sample_candidates(count, seed):
+    """``count`` distinct parameter sets drawn from ``PARAMETER_SPACE``."""
+    rng = np.random.default_rng(seed)
+    candidates = []
+    seen = set()
+    attempts = 0
+    while len(candidates) < count and attempts < count * 100:
+        attempts += 1
+        candidate = {name: values[rng.integers(len(values))] for name, values in PARAMETER_SPACE.items()}
+        key = tuple(candidate.values())
+        if key not in seen:
+            seen.add(key)
+            candidates.append(candidate)
+    return candidates
+
+
+def fold_indices(n_rows, folds, seed):
+    """Shuffled (train, validation) index pairs for k-fold cross-validation."""
+    from sklearn.model_selection import KFold
+
+    return list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(np.arange(n_rows)))
+
+
+def _regressor(params, seed, n_estimators, n_jobs, early_stopping_rounds=None):
+    from xgboost import XGBRegressor
+
+    return XGBRegressor(
+        objective="reg:squarederror", n_estimators=n_estimators, random_state=seed, n_jobs=n_jobs,
+        early_stopping_rounds=early_stopping_rounds, **params,
+    )
+
+
+# Training data of the worker process, set once by the pool initializer
+_worker_data = {}
+
+
+def _init_worker(X, y):
+    _worker_data["X"], _worker_data["y"] = X, y
+
+
+def _score_fold(params, train, validation, seed):
+    # One early-stopped fit; returns the best validation RMSE and round count
+    X, y = _worker_data["X"], _worker_data["y"]
+    model = _regressor(params, seed, MAX_ROUNDS, n_jobs=1, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+    model.fit(X[train], y[train], eval_set=[(X[validation], y[validation])], verbose=False)
+    return float(model.best_score), int(model.best_iteration) + 1
+
+
+def search(X, y, candidates, folds, seed, n_jobs=1):
+    """Cross-validated score of every candidate, best first.
+
+    Each entry is the candidate's parameters with ``cv_rmse`` (mean over
+    folds), ``cv_rmse_std`` and ``n_estimators`` (mean best round count).
+    """
+    tasks = [(params, train, validation, seed) for params in candidates for train, validation in folds]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(X, y)) as pool:
+            scores = list(pool.map(_score_fold, *zip(*tasks), chunksize=max(1, len(tasks) // (n_jobs * 4))))
+    else:
+        _init_worker(X, y)
+        scores = [_score_fold(*task) for task in tasks]
+
+    results = []
+    for index, params in enumerate(candidates):
+        rmse, rounds = zip(*scores[index * len(folds):(index + 1) * len(folds)])
+        results.append({
+            "params": params,
+            "cv_rmse": float(np.mean(rmse)),
+            "cv_rmse_std": float(np.std(rmse)),
+            "n_estimators": int(round(np.mean(rounds))),
+        })
+    return sorted(results, key=lambda result: result["cv_rmse"])
+
+
+def fit_final(matches, feature_names, params, n_estimators, seed):
+    """Fit on all matches; fitted on a DataFrame so ``feature_names_in_`` is set.
+
+    Single-threaded: it takes well under a second, and the thread count is
+    stored in the pickle, which would otherwise differ between ``--jobs``.
+    """
+    import pandas as pd
+
+    X = pd.DataFrame(feature_matrix(matches, feature_names), columns=feature_names)
+    model = _regressor(params, seed, n_estimators, n_jobs=1)
+    model.fit(X, matches[TARGET_COLUMN].to_numpy())
+    return model
+
+
+def write_model(model, path):
+    """Pickle ``model`` to ``path`` via a temporary file; returns its content hash."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".partial", "wb") as file:
+        pickle.dump(model, file)
+    os.replace(path + ".partial", path)
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:16]
+
+
+@contextmanager
+def stage(name, timings):
+    """Log and keep the wall-clock time of a pipeline stage."""
+    logger.info("%s ...", name)
+    start = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - start, 2)
+    logger.info("%s done in %.2f s", name, timings[name])
+
+
+def train(data_path=TRAINING_DATA_PATH, output_dir=TRAINING_OUTPUT_DIR, models=tuple(MODEL_FEATURES), candidates=24,
+          folds=5, seed=42, n_jobs=1):
+    """Run the whole pipeline and write the models; returns the report."""
+    import pandas as pd
+
+    os.makedirs(output_dir, exist_ok=True)
+    timings = {}
+    report = {"data": os.path.basename(data_path), "seed": seed, "folds": folds, "candidates": candidates,
+              "n_jobs": n_jobs, "models": {}, "timings": timings}
+    with stage("load data", timings):
+        with open(data_path, "rb") as file:
+            report["data_sha256"] = hashlib.sha256(file.read()).hexdigest()[:16]
+        matches = prepare_matches(pd.read_csv(data_path))
+        y = matches[TARGET_COLUMN].to_numpy(dtype=np.float32)
+        report["matches"] = len(matches)
+    logger.info("%d matches after filtering", len(matches))
+
+    parameter_sets = sample_candidates(candidates, seed)
+    splits = fold_indices(len(matches), folds, seed)
+    for name in models:
+        feature_names = MODEL_FEATURES[name]
+        with stage(f"{name}: features", timings):
+            X = feature_matrix(matches, feature_names)
+        with stage(f"{name}: search ({len(parameter_sets)} candidates x {folds} folds)", timings):
+            results = search(X, y, parameter_sets, splits, seed, n_jobs)
+        best = results[0]
+        logger.info("%s: best CV RMSE %.4f (+/- %.4f) with %d rounds, %s", name, best["cv_rmse"],
+                    best["cv_rmse_std"], best["n_estimators"], best["params"])
+        with stage(f"{name}: refit", timings):
+            model = fit_final(matches, feature_names, best["params"], best["n_estimators"], seed)
+        with stage(f"{name}: write", timings):
+            path = os.path.join(output_dir, os.path.basename(MODEL_PATHS[name]))
+            version = write_model(model, path)
+        report["models"][name] = {"path": path, "version": version, "best": best, "top": results[:5]}
+
+    with open(os.path.join(output_dir, "training_report.json"), "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m attendance.training", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--data", default=TRAINING_DATA_PATH, help="match history CSV (default: %(default)s)")
+    parser.add_argument("--output-dir", default=TRAINING_OUTPUT_DIR,
+                        help="where the .sav files and training_report.json are written "
+                             "(default: %(default)s; the served models are not replaced)")
+    parser.add_argument("--model", choices=sorted(MODEL_FEATURES), action="append",
+                        help="train only this model (repeatable; default: both)")
+    parser.add_argument("--candidates", type=int, default=24, help="hyperparameter sets tried (default: 24)")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds (default: 5)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes for the search (default: all cores)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    started = time.perf_counter()
+    report = train(args.data, os.path.abspath(args.output_dir), args.model or tuple(MODEL_FEATURES),
+                   max(1, args.candidates), args.folds, args.seed, max(1, args.jobs))
+    print(f"{'stage':<52} {'seconds':>8}")
+    for name, seconds in report["timings"].items():
+        print(f"{name:<52} {seconds:>8.2f}")
+    print(f"{'total':<52} {time.perf_counter() - started:>8.2f}")
+    for name, result in report["models"].items():
+        print(f"{name}: CV RMSE {result['best']['cv_rmse']:.4f} -> {result['path']} ({result['version']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
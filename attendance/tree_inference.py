@@ -0,0 +1,206 @@
+"""Array-backed evaluation of the XGBoost attendance models.
+
+``XGBRegressor.predict`` validates a DataFrame, builds a DMatrix and hands the
+work to a thread pool, which dominates the cost of scoring a single match.
+``CompiledEnsemble`` extracts every tree once into flat NumPy arrays and walks
+all trees for all rows in lock-step, one tree level per step.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+class CompiledEnsemble:
+    """Flat-array copy of a gradient boosted tree ensemble.
+
+    Nodes of all trees are concatenated; ``roots`` holds the index of every
+    tree's root node. Leaves point to themselves so that rows which reach a
+    leaf early simply stay there for the remaining levels.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, depth, base_score, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_score = base_score
+        self.feature_names = feature_names
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_features(self):
+        if self.feature_names is not None:
+            return len(self.feature_names)
+        return int(self.feature.max()) + 1
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile a fitted ``XGBRegressor`` (or raw ``Booster``)."""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        dump = json.loads(booster.save_raw("json"))
+        learner = dump["learner"]
+
+        objective = learner["objective"]["name"]
+        if objective != "reg:squarederror":
+            raise ValueError(f"Unsupported objective for compiled inference: {objective}")
+        booster_type = learner["gradient_booster"]["name"]
+        if booster_type != "gbtree":
+            raise ValueError(f"Unsupported booster for compiled inference: {booster_type}")
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        # Respect early stopping the same way XGBRegressor.predict does
+        best_iteration = getattr(model, "best_iteration", None)
+        if best_iteration is not None:
+            trees = trees[:best_iteration + 1]
+
+        features, thresholds, lefts, rights, defaults, values, roots = [], [], [], [], [], [], []
+        depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported by compiled inference")
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            right = np.asarray(tree["right_children"], dtype=np.int64)
+            node_ids = np.arange(len(left))
+            is_leaf = left == -1
+
+            # Leaves loop back onto themselves; internal nodes get a global index
+            lefts.append(np.where(is_leaf, node_ids, left) + offset)
+            rights.append(np.where(is_leaf, node_ids, right) + offset)
+            features.append(np.where(is_leaf, 0, tree["split_indices"]))
+            # For leaves, XGBoost stores the leaf value in split_conditions
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            thresholds.append(np.where(is_leaf, np.float32(0), conditions))
+            values.append(np.where(is_leaf, conditions, np.float32(0)))
+            defaults.append(np.asarray(tree["default_left"], dtype=bool))
+            roots.append(offset)
+            depth = max(depth, _tree_depth(left, right))
+            offset += len(left)
+
+        base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+        feature_names = getattr(model, "feature_names_in_", None)
+        if feature_names is not None:
+            feature_names = [str(name) for name in feature_names]
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float32),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            default_left=np.concatenate(defaults),
+            value=np.concatenate(values).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.intp),
+            depth=depth,
+            base_score=base_score,
+            feature_names=feature_names,
+        )
+
+    def save(self, path):
+        """Write the arrays to an ``.npz`` file that ``load`` can read back.
+
+        The file is written under a temporary name and then renamed, so a
+        crash or a concurrent writer never leaves a truncated file at ``path``.
+        """
+        partial = f"{path}.{os.getpid()}.partial"
+        with open(partial, "wb") as file:
+            np.savez(
+                file, feature=self.feature, threshold=self.threshold, left=self.left,
+                right=self.right, default_left=self.default_left, value=self.value,
+                roots=self.roots, depth=self.depth, base_score=self.base_score,
+                feature_names=np.asarray(self.feature_names or [], dtype=str),
+            )
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an ensemble written by ``save``; no XGBoost import is needed."""
+        with np.load(path) as arrays:
+            feature_names = [str(name) for name in arrays["feature_names"]] or None
+            return cls(
+                feature=arrays["feature"], threshold=arrays["threshold"], left=arrays["left"],
+                right=arrays["right"], default_left=arrays["default_left"], value=arrays["value"],
+                roots=arrays["roots"], depth=int(arrays["depth"]),
+                base_score=float(arrays["base_score"]), feature_names=feature_names,
+            )
+
+    def split_thresholds(self, feature):
+        """Sorted distinct thresholds the ensemble compares feature ``feature`` with.
+
+        ``feature`` is a column position or, if the names are known, a name.
+        Inputs between two consecutive thresholds take identical paths.
+        """
+        if isinstance(feature, str):
+            feature = self.feature_names.index(feature)
+        internal = self.left != np.arange(len(self.left))
+        return np.unique(self.threshold[internal & (self.feature == feature)])
+
+    def leaf_indices(self, X):
+        """Global index of the leaf each row reaches in each tree, shape (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[nodes]]
+            # XGBoost sends x < threshold left and missing values to the default side
+            go_left = np.where(np.isnan(x), self.default_left[nodes], x < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X):
+        """Predict one value per row of ``X`` (a 1-D row or a 2-D matrix)."""
+        leaves = self.leaf_indices(X)
+        # Accumulate in float32 like XGBoost so results agree to float32 precision
+        return self.value[leaves].sum(axis=1, dtype=np.float32) + np.float32(self.base_score)
+
+
+def _tree_depth(left, right):
+    # Breadth-first walk from the root, counting the levels of split nodes
+    depth = 0
+    level = [0]
+    while True:
+        children = [child for node in level for child in (left[node], right[node]) if child != -1]
+        if not children:
+            return depth
+        depth += 1
+        level = children
+
+
+def check_parity(model, X, atol=1e-5):
+    """Largest absolute difference between compiled and native predictions.
+
+    Raises ``AssertionError`` when the two disagree by more than ``atol``.
+    """
+    import pandas as pd
+
+    compiled = CompiledEnsemble.from_model(model)
+    X = np.asarray(X, dtype=np.float32)
+    native = model.predict(pd.DataFrame(X, columns=compiled.feature_names))
+    difference = float(np.max(np.abs(compiled.predict(X) - native)))
+    if difference > atol:
+        raise AssertionError(f"Compiled predictions differ from predict() by {difference}")
+    return difference
+
+
+if __name__ == "__main__":
+    # Parity check of both registered models on random inputs:
+    # python -m attendance.tree_inference
+    from attendance.models import MODEL_PATHS, get_model
+
+    rng = np.random.default_rng(42)
+    for name in MODEL_PATHS:
+        model = get_model(name)
+        X = (rng.random((2000, model.n_features_in_)) < 0.1).astype(np.float32)
+        X[:, :9] = rng.integers(0, 40, size=(2000, 9))
+        print(f"{name}: max abs difference {check_parity(model, X):.2e}")
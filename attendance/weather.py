@@ -0,0 +1,255 @@
+"""Match-time weather lookups against the Open-Meteo forecast API."""
+
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import requests
+
+from attendance.climatology import get_climatology
+from attendance.http_client import get_weather_client
+from attendance.refresher import BackgroundRefresher
+from attendance.singleflight import SingleFlight
+from attendance.teams import STADIUM_LOCATIONS
+from attendance.timing import timed
+from attendance.weather_cache import get_weather_cache
+
+logger = logging.getLogger(__name__)
+
+# Open-Meteo serves hourly forecasts for today and the following 15 days
+FORECAST_DAYS = 16
+# How often a cache miss may trigger a bulk refresh of all stadiums
+PREFETCH_INTERVAL = 60 * 60
+
+_last_prefetch = 0.0
+_prefetch_lock = threading.Lock()
+
+# Optional forecast grid size in degrees. When set, location coordinates are
+# snapped to the grid so stadiums in the same cell share one cache entry
+WEATHER_GRID_DEGREES = float(os.environ.get("ATTENDANCE_WEATHER_GRID", 0)) or None
+
+# Concurrent sessions missing the cache for the same (location, day) share one request
+_forecast_flight = SingleFlight()
+
+# Expired forecasts are served immediately and re-fetched on these threads
+_refresher = BackgroundRefresher(max_workers=2, name="weather-refresh")
+
+# Interactive lookups run here so the app can predict while the forecast loads
+_lookup_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="weather-lookup")
+
+# Seconds the app waits for the forecast before keeping the no-weather prediction
+WEATHER_DEADLINE = 3.0
+
+# Weather at kickoff; fetched_at is the Unix time the forecast was retrieved and
+# source is "forecast" or "climatology" (typical weather for dates out of range)
+MatchWeather = namedtuple("MatchWeather", ["temperature", "condition", "fetched_at", "source"],
+                          defaults=("forecast",))
+NO_WEATHER = MatchWeather(None, None, None, None)
+
+
+def weather_condition_for_code(weather_code):
+    """Map an Open-Meteo weather code to the categories the model was trained on."""
+    if weather_code in [0]:
+        return "Clear or mostly clear"
+    elif weather_code in [1, 2, 3]:
+        return "Partly cloudy"
+    elif weather_code in [61, 63, 65, 80, 81, 82]:
+        return "Rainy"
+    elif weather_code in [51, 53, 55]:
+        return "Drizzle"
+    elif weather_code in [71, 73, 75, 85, 86, 77]:
+        return "Snowy"
+    return "Unknown"
+
+
+@timed("weather_fetch")
+def fetch_hourly_forecast(latitude, longitude, match_date):
+    """Request the hourly temperature and weather code arrays for one day."""
+    weather_data = get_weather_client().get_json({
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": match_date,
+        "end_date": match_date,
+        "hourly": "temperature_2m,weathercode",
+        "timezone": "auto",
+    })
+    hourly_data = weather_data['hourly']
+    return {
+        "temperature_2m": hourly_data['temperature_2m'],
+        "weathercode": hourly_data['weathercode'],
+    }
+
+
+@timed("weather_bulk_fetch")
+def fetch_bulk_forecast(locations, forecast_days=FORECAST_DAYS):
+    """Request the whole forecast horizon for many locations at once.
+
+    ``locations`` is a list of ``(latitude, longitude)`` pairs. Returns one
+    dict per location mapping each date to that day's hourly arrays.
+    """
+    payload = get_weather_client().get_json({
+        "latitude": ",".join(str(latitude) for latitude, _ in locations),
+        "longitude": ",".join(str(longitude) for _, longitude in locations),
+        "forecast_days": forecast_days,
+        "hourly": "temperature_2m,weathercode",
+        "timezone": "auto",
+    })
+    # A single location comes back as an object rather than a list
+    if isinstance(payload, dict):
+        payload = [payload]
+
+    forecasts = []
+    for weather_data in payload:
+        hourly_data = weather_data['hourly']
+        days = {}
+        for index, timestamp in enumerate(hourly_data['time']):
+            day = days.setdefault(datetime.date.fromisoformat(timestamp[:10]),
+                                  {"temperature_2m": [], "weathercode": []})
+            day["temperature_2m"].append(hourly_data['temperature_2m'][index])
+            day["weathercode"].append(hourly_data['weathercode'][index])
+        forecasts.append(days)
+    return forecasts
+
+
+def location_coordinates(location_id, grid_degrees=None):
+    """Coordinates weather is requested and cached for at a stadium location."""
+    grid_degrees = grid_degrees or WEATHER_GRID_DEGREES
+    location = STADIUM_LOCATIONS[location_id]
+    latitude, longitude = location['latitude'], location['longitude']
+    if grid_degrees:
+        latitude = round(round(latitude / grid_degrees) * grid_degrees, 6)
+        longitude = round(round(longitude / grid_degrees) * grid_degrees, 6)
+    return latitude, longitude
+
+
+def prefetch_stadium_forecasts(cache=None):
+    """Fill the weather cache for every stadium over the full forecast horizon.
+
+    Uses a single API request; returns the number of cached (location, day)
+    entries. Entries too old to be served are deleted afterwards, so the
+    cache file does not grow with every past match day.
+    """
+    cache = cache or get_weather_cache()
+    locations = sorted({location_coordinates(location_id) for location_id in STADIUM_LOCATIONS})
+    fetched_at = time.time()
+    stored = 0
+    for (latitude, longitude), days in zip(locations, fetch_bulk_forecast(locations)):
+        for day, hourly_data in days.items():
+            cache.put(latitude, longitude, day, hourly_data, fetched_at=fetched_at)
+            stored += 1
+    cache.purge_expired()
+    return stored
+
+
+def _maybe_prefetch(match_date):
+    # Refresh all stadiums at most once per PREFETCH_INTERVAL, and only for
+    # dates the forecast actually covers. Returns True if a prefetch ran.
+    global _last_prefetch
+    days_ahead = (match_date - datetime.date.today()).days
+    if not 0 <= days_ahead < FORECAST_DAYS or get_weather_client().breaker.is_open:
+        return False
+    with _prefetch_lock:
+        if time.time() - _last_prefetch < PREFETCH_INTERVAL:
+            return False
+        _last_prefetch = time.time()
+        try:
+            prefetch_stadium_forecasts()
+        except (requests.RequestException, KeyError, ValueError):
+            return False
+    return True
+
+
+def _load_hourly_forecast(latitude, longitude, match_date):
+    # Runs once per (location, day) among concurrent callers. A bulk prefetch
+    # or an earlier caller may already have filled the cache in the meantime.
+    cache = get_weather_cache()
+    _maybe_prefetch(match_date)
+    entry = cache.lookup(latitude, longitude, match_date, record=False)
+    if entry is not None and entry[2]:
+        return entry[0], entry[1]
+    hourly_data = fetch_hourly_forecast(latitude, longitude, match_date)
+    fetched_at = time.time()
+    cache.put(latitude, longitude, match_date, hourly_data, fetched_at=fetched_at)
+    return hourly_data, fetched_at
+
+
+def get_hourly_forecast(latitude, longitude, match_date):
+    """Hourly forecast for the day and the time it was fetched.
+
+    Fresh cache entries are returned as is. Expired ones are returned too,
+    while a background refresh replaces them, so only a complete miss waits
+    for the API.
+    """
+    key = (latitude, longitude, match_date)
+    entry = get_weather_cache().lookup(latitude, longitude, match_date)
+    if entry is not None:
+        hourly_data, fetched_at, is_fresh = entry
+        if not is_fresh:
+            _refresher.schedule(key, _forecast_flight.do, key, _load_hourly_forecast, *key)
+        return hourly_data, fetched_at
+    return _forecast_flight.do(key, _load_hourly_forecast, *key)
+
+
+def get_match_weather(latitude, longitude, match_date, match_hour):
+    """Weather at kickoff as a ``MatchWeather``; ``NO_WEATHER`` if unavailable."""
+    try:
+        hourly_data, fetched_at = get_hourly_forecast(latitude, longitude, match_date)
+        temperature_at_match = hourly_data['temperature_2m'][match_hour]
+        weather_code_at_match = hourly_data['weathercode'][match_hour]
+        return MatchWeather(temperature_at_match, weather_condition_for_code(weather_code_at_match), fetched_at)
+    # Network errors, an open circuit breaker, an unexpected payload or an
+    # unusable cache all mean the match is predicted without weather
+    except (requests.RequestException, KeyError, IndexError, TypeError, ValueError, OSError, sqlite3.Error):
+        return NO_WEATHER
+
+
+@timed("weather_lookup")
+def get_location_weather(location_id, match_date, match_hour):
+    """Weather at a stadium location for the kickoff hour, as a ``MatchWeather``.
+
+    Dates beyond the forecast horizon are answered locally from the
+    climatology of past matches at the stadium, without calling the API.
+    """
+    if (match_date - datetime.date.today()).days >= FORECAST_DAYS:
+        temperature, condition = get_climatology().estimate(location_id, match_date.month, match_hour)
+        if temperature is None:
+            return NO_WEATHER
+        return MatchWeather(temperature, condition, None, "climatology")
+    latitude, longitude = location_coordinates(location_id)
+    return get_match_weather(latitude, longitude, match_date, match_hour)
+
+
+def submit_location_weather(location_id, match_date, match_hour):
+    """Start ``get_location_weather`` in the background and return its future."""
+    return _lookup_executor.submit(get_location_weather, location_id, match_date, match_hour)
+
+
+def wait_for_weather(future, timeout):
+    """Result of a submitted lookup, or ``NO_WEATHER`` if it is not ready in time
+    or failed.
+
+    A lookup that misses the deadline keeps running and fills the cache for
+    the next rerun.
+    """
+    try:
+        return future.result(timeout=max(0.0, timeout))
+    except TimeoutError:
+        return NO_WEATHER
+    # Whatever went wrong in the lookup, the prediction goes ahead without weather
+    except Exception:
+        logger.warning("Weather lookup failed", exc_info=True)
+        return NO_WEATHER
+
+
+def weather_stats():
+    """Cache, request-coalescing and background refresh counters."""
+    return {
+        "cache": get_weather_cache().stats(),
+        "requests": _forecast_flight.stats(),
+        "refresh": _refresher.stats(),
+    }
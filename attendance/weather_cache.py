@@ -0,0 +1,136 @@
+"""Persistent on-disk cache for Open-Meteo hourly forecasts.
+
+Forecasts are stored per (latitude, longitude, date) as the full 24-hour
+arrays returned by the API, so any kickoff hour on that day is served from
+the same entry. Entries for matches in the next few days expire quickly,
+because those forecasts are still being revised; far-out dates change less
+and are kept longer.
+"""
+
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from attendance.models import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+WEATHER_CACHE_PATH = os.path.join(CACHE_DIR, "weather.sqlite")
+
+# Forecasts for matches within NEAR_TERM_DAYS expire after NEAR_TERM_TTL seconds
+NEAR_TERM_DAYS = 2
+NEAR_TERM_TTL = 60 * 60
+FAR_TERM_TTL = 6 * 60 * 60
+# Expired entries may still be served (while a refresh runs) for this long
+MAX_STALE_AGE = 24 * 60 * 60
+
+
+class WeatherCache:
+    """SQLite-backed store of hourly forecasts with a date-dependent TTL."""
+
+    def __init__(self, path=WEATHER_CACHE_PATH, near_term_days=NEAR_TERM_DAYS,
+                 near_term_ttl=NEAR_TERM_TTL, far_term_ttl=FAR_TERM_TTL, max_stale_age=MAX_STALE_AGE):
+        self.path = path
+        self.near_term_days = near_term_days
+        self.near_term_ttl = near_term_ttl
+        self.far_term_ttl = far_term_ttl
+        self.max_stale_age = max_stale_age
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Streamlit runs every session in its own thread, so share one
+        # connection and serialise access with a lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS forecasts ("
+                " latitude REAL, longitude REAL, date TEXT,"
+                " hourly TEXT NOT NULL, fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (latitude, longitude, date))"
+            )
+
+    def ttl_for(self, match_date, today=None):
+        """Seconds a forecast for ``match_date`` stays valid."""
+        today = today or datetime.date.today()
+        if (match_date - today).days <= self.near_term_days:
+            return self.near_term_ttl
+        return self.far_term_ttl
+
+    def lookup(self, latitude, longitude, match_date, record=True):
+        """Cached entry for the day as ``(hourly, fetched_at, is_fresh)``.
+
+        Expired entries are still returned (with ``is_fresh`` False) until they
+        are ``max_stale_age`` seconds past their TTL; older or absent entries
+        give ``None``. ``record=False`` leaves the hit/miss counters untouched.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hourly, fetched_at FROM forecasts WHERE latitude = ? AND longitude = ? AND date = ?",
+                (latitude, longitude, match_date.isoformat()),
+            ).fetchone()
+            age = None if row is None else time.time() - row[1]
+            ttl = self.ttl_for(match_date)
+            if age is None or age > ttl + self.max_stale_age:
+                if record:
+                    self.misses += 1
+                return None
+            is_fresh = age <= ttl
+            if record:
+                if is_fresh:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+        return json.loads(row[0]), row[1], is_fresh
+
+    def put(self, latitude, longitude, match_date, hourly, fetched_at=None):
+        """Store the hourly arrays for one location and day."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?)",
+                (latitude, longitude, match_date.isoformat(), json.dumps(hourly), fetched_at),
+            )
+
+    def purge_expired(self):
+        """Delete entries too old to be served even as stale; returns the number removed."""
+        cutoff = time.time() - max(self.near_term_ttl, self.far_term_ttl) - self.max_stale_age
+        with self._lock, self._connection:
+            return self._connection.execute("DELETE FROM forecasts WHERE fetched_at < ?", (cutoff,)).rowcount
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_weather_cache():
+    """Process-wide cache instance, opened on first use.
+
+    Falls back to an in-memory cache for this process if the cache directory
+    cannot be written, e.g. in a read-only container.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = WeatherCache()
+                except (OSError, sqlite3.Error) as error:
+                    logger.warning("Weather cache %s unavailable (%s); caching in memory", WEATHER_CACHE_PATH, error)
+                    _cache = WeatherCache(":memory:")
+    return _cache
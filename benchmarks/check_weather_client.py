@@ -0,0 +1,90 @@
+"""Check the weather client's retries and circuit breaker against the stub.
+
+    python benchmarks/check_weather_client.py
+
+Drives ``WeatherClient`` against ``weather_stub`` while the stub answers
+normally, with 503s and with truncated chunked bodies, and checks that
+every failure reaches the breaker: it opens, lets a single trial call
+through after ``reset_timeout``, re-opens when that trial fails in any way
+and closes again once the API is back. Exits with status 1 if a check fails.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PARAMS = {"latitude": "47.5", "longitude": "7.6", "hourly": "temperature_2m,weathercode", "forecast_days": "1"}
+
+
+def scenario(failure, reset_timeout):
+    """Failures of one kind, a failing trial, then recovery; returns the failed checks."""
+    import requests
+
+    from attendance.http_client import CircuitBreaker, CircuitOpenError, WeatherClient
+    from weather_stub import start_stub, stub_url
+
+    stub = start_stub(failure=failure)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    client = WeatherClient(stub_url(stub), max_retries=1, backoff=0.01, breaker=breaker)
+    errors = []
+
+    def expect(condition, message):
+        if not condition:
+            errors.append(f"{failure}: {message}")
+
+    def call():
+        try:
+            client.get_json(PARAMS)
+            return None
+        except requests.RequestException as error:
+            return error
+
+    try:
+        error = call()
+        expect(error is not None and not isinstance(error, CircuitOpenError), f"first call raised {error!r}")
+        expect(stub.requests == 2, f"{stub.requests} requests, expected the call and one retry")
+        expect(breaker.is_open, "breaker did not open")
+        expect(isinstance(call(), CircuitOpenError), "open breaker let a call through")
+
+        # The trial call fails the same way and must re-open the breaker
+        time.sleep(reset_timeout)
+        error = call()
+        expect(error is not None and not isinstance(error, CircuitOpenError), f"trial call raised {error!r}")
+        expect(breaker.is_open, "breaker not open after a failed trial")
+
+        stub.failure = None
+        time.sleep(reset_timeout)
+        expect(not breaker.is_open, "breaker stuck open after reset_timeout")
+        expect(call() is None, "trial call against the recovered stub failed")
+        expect(not breaker.is_open and breaker.failures == 0, "breaker did not close after a successful trial")
+    finally:
+        client.close()
+        stub.shutdown()
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reset-timeout", type=float, default=0.1,
+                        help="breaker reset timeout in seconds (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    sys.path.insert(0, BENCHMARK_DIR)
+    errors = []
+    for failure in ("server_error", "truncated"):
+        failed = scenario(failure, args.reset_timeout)
+        print(f"{failure}: {'FAIL' if failed else 'ok'}")
+        errors += failed
+
+    for error in errors:
+        print(f"ERROR {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
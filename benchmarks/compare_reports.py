@@ -0,0 +1,52 @@
+"""Compare two reports written by ``run_benchmarks.py``.
+
+    python benchmarks/compare_reports.py before.json after.json [--metric p95_ms]
+
+Prints every stage with its value in both reports and the ratio after/before,
+marking changes larger than ``--threshold`` (default 10 %).
+"""
+
+import argparse
+import json
+import sys
+
+
+def stage_values(report, metric):
+    values = {name: stats[metric] for name, stats in report.get("stages", {}).items()}
+    app = report.get("app")
+    if app:
+        values["app_first_render"] = app["first_render_ms"]
+        values["app_predict_rerun"] = app["predict_rerun"][metric]
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--metric", default="p50_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change to flag (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding="utf-8") as file:
+        before = json.load(file)
+    with open(args.after, encoding="utf-8") as file:
+        after = json.load(file)
+
+    old, new = stage_values(before, args.metric), stage_values(after, args.metric)
+    print(f"{'stage':<28} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12}  ratio")
+    for name in sorted(set(old) | set(new)):
+        if name not in old or name not in new:
+            print(f"{name:<28} {old.get(name, '-'):>12} {new.get(name, '-'):>12}")
+            continue
+        ratio = new[name] / old[name] if old[name] else float("inf")
+        flag = "  <-- slower" if ratio > 1 + args.threshold else "  <-- faster" if ratio < 1 - args.threshold else ""
+        print(f"{name:<28} {old[name]:>12.3f} {new[name]:>12.3f}  {ratio:5.2f}x{flag}")
+
+    fixtures = after.get("fixtures", {})
+    print(f"\nFixture mismatches against the reference: {fixtures.get('mismatches', 'n/a')}")
+    return 1 if fixtures.get("mismatches") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Per-stage latency benchmarks and a fixed-fixture regression check.
+
+Runs everything against a local weather stub and an empty, temporary cache
+directory, so results do not depend on the network or on earlier runs:
+
+* every stage of a prediction on its own (model load, weather fetch and
+  cached lookup, league CSV parsing, feature encoding, prediction, chart
+  rendering and league-table HTML), repeated and summarised as
+  p50/p95/p99 in milliseconds;
+* complete reruns of ``app_v4_final.py`` driven by Streamlit's ``AppTest``
+  (first render, then repeated "Predict" clicks);
+* the fixtures in ``benchmarks/fixtures.csv`` through the engine, compared
+  with ``benchmarks/reference_predictions.json``.
+
+The JSON report is meant to be kept per commit and diffed:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json
+    python benchmarks/compare_reports.py before.json after.json
+
+Exits with status 1 if a fixture prediction differs from the reference.
+``--update-reference`` rewrites the reference after an intended model change.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+FIXTURES_PATH = os.path.join(BENCHMARK_DIR, "fixtures.csv")
+REFERENCE_PATH = os.path.join(BENCHMARK_DIR, "reference_predictions.json")
+APP_PATH = os.path.join(REPO_DIR, "app_v4_final.py")
+
+# Largest difference in predicted percent accepted as "unchanged"
+PERCENT_TOLERANCE = 1e-3
+
+
+def timings(function, repeat, warmup=1):
+    """Wall-clock seconds of ``repeat`` calls of ``function`` after ``warmup`` calls."""
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    """Percentiles of a list of durations in seconds, reported in milliseconds."""
+    values = np.asarray(samples) * 1000
+    return {
+        "n": len(values),
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "max_ms": round(float(values.max()), 4),
+    }
+
+
+def stage_benchmarks(repeat, slow_repeat):
+    """Time each stage of a single prediction in isolation."""
+    import pandas as pd
+
+    from attendance import models
+    from attendance.charts import attendance_chart_svg
+    from attendance.engine import Fixture, as_fixture, build_features, predict_attendance
+    from attendance.league import LEAGUE_DATA_PATH, LeagueStore, get_league_store
+    from attendance.league_table import league_table_html, render_table_body
+    from attendance.teams import STADIUM_LOCATIONS, TEAM_LOCATIONS
+    from attendance.tree_inference import CompiledEnsemble
+    from attendance.weather import NO_WEATHER, fetch_hourly_forecast, get_location_weather
+
+    match_date = datetime.date.today() + datetime.timedelta(days=3)
+    fixture = as_fixture(Fixture("Super League", 12, "FC Basel", match_date, 18, "FC Zürich"))
+    stadium = TEAM_LOCATIONS[fixture.home_team]
+    coordinates = STADIUM_LOCATIONS[stadium]
+    league_store = get_league_store()
+    teams = league_store.by_team()
+    match_weather = get_location_weather(stadium, match_date, 18)
+    features = build_features(fixture, match_weather, teams)
+    encoder = models.get_encoder("with_weather")
+    compiled = models.get_compiled_model("with_weather")
+    row = encoder.encode(features)
+    npz_path = os.path.join(os.environ["ATTENDANCE_CACHE_DIR"], "benchmark-model.npz")
+    compiled.save(npz_path)
+    records = league_store.records()
+
+    stages = {
+        "model_load_pickle": (lambda: models.load_model(models.MODEL_PATHS["with_weather"]), slow_repeat),
+        "model_compile": (lambda: CompiledEnsemble.from_model(models.get_model("with_weather")), slow_repeat),
+        "model_load_compiled": (lambda: CompiledEnsemble.load(npz_path), repeat),
+        "weather_fetch_stub": (
+            lambda: fetch_hourly_forecast(coordinates["latitude"], coordinates["longitude"], match_date), repeat),
+        "weather_lookup_cached": (lambda: get_location_weather(stadium, match_date, 18), repeat),
+        "read_csv_pandas": (lambda: pd.read_csv(LEAGUE_DATA_PATH), repeat),
+        "league_parse": (lambda: LeagueStore().by_team(), repeat),
+        "league_lookup": (lambda: (league_store.get("FC Basel"), league_store.get("FC Zürich")), repeat),
+        "feature_encoding": (lambda: encoder.encode(features), repeat),
+        "predict_single_row": (lambda: compiled.predict(row), repeat),
+        "predict_engine_no_cache": (
+            lambda: predict_attendance(fixture, weather=match_weather, use_cache=False), repeat),
+        "predict_engine_cached": (lambda: predict_attendance(fixture, weather=match_weather), repeat),
+        "predict_engine_no_weather": (
+            lambda: predict_attendance(fixture, weather=NO_WEATHER, use_cache=False), repeat),
+        "chart_svg_render": (
+            lambda: attendance_chart_svg.__wrapped__(24000.0, 38512, 19527.0, 22666.5, 62.31), repeat),
+        "league_table_body": (lambda: render_table_body(records), repeat),
+        "league_table_html_cached": (lambda: league_table_html(league_store, "FC Basel", "FC Zürich"), repeat),
+    }
+    return {name: summarize(timings(function, count)) for name, (function, count) in stages.items()}
+
+
+def app_benchmarks(reruns):
+    """First render and repeated prediction reruns of the Streamlit app."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    first_render = time.perf_counter() - start
+    errors = [str(error.value) for error in app.exception]
+
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.button[0].click().run()
+        samples.append(time.perf_counter() - start)
+        errors.extend(str(error.value) for error in app.exception)
+    return {
+        "first_render_ms": round(first_render * 1000, 2),
+        "predict_rerun": summarize(samples),
+        "status": [element.value for element in app.success],
+        "info": [element.value for element in app.info],
+        "exceptions": errors,
+    }
+
+
+def fixture_predictions():
+    """Engine predictions for the fixed fixture list, without forecast lookups."""
+    import csv
+
+    from attendance.engine import predict_many
+
+    with open(FIXTURES_PATH, newline="", encoding="utf-8") as file:
+        fixtures = list(csv.DictReader(file))
+    predictions = predict_many(fixtures, fetch_weather=False, use_cache=False)
+    return [
+        {"percentage": round(prediction.percentage, 6), "attendance": prediction.attendance,
+         "status": prediction.status, "model": prediction.model}
+        for prediction in predictions
+    ]
+
+
+def compare_fixtures(current, reference):
+    """Count the fixtures whose prediction moved against the reference."""
+    if len(current) != len(reference):
+        return {"count": len(current), "reference_count": len(reference), "mismatches": len(current)}
+    differences = [abs(a["percentage"] - b["percentage"]) for a, b in zip(current, reference)]
+    mismatches = [
+        index for index, (a, b, difference) in enumerate(zip(current, reference, differences))
+        if difference > PERCENT_TOLERANCE or a["status"] != b["status"] or a["model"] != b["model"]
+    ]
+    return {
+        "count": len(current),
+        "max_abs_diff_percent": max(differences, default=0.0),
+        "mismatches": len(mismatches),
+        "mismatched_rows": mismatches,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="samples per fast stage (default: 200)")
+    parser.add_argument("--slow-repeat", type=int, default=5,
+                        help="samples for unpickling and compiling the model (default: 5)")
+    parser.add_argument("--app-reruns", type=int, default=20, help="timed app reruns (default: 20)")
+    parser.add_argument("--skip-app", action="store_true", help="do not drive the Streamlit app")
+    parser.add_argument("--output", "-o", help="write the JSON report here (default: stdout only)")
+    parser.add_argument("--update-reference", action="store_true",
+                        help="store the current fixture predictions as the new reference")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    sys.path.insert(0, REPO_DIR)
+    sys.path.insert(0, BENCHMARK_DIR)
+    from weather_stub import start_stub, stub_url
+
+    # Both have to be set before the attendance package is imported
+    stub = start_stub()
+    os.environ["OPEN_METEO_URL"] = stub_url(stub)
+    cache_dir = tempfile.mkdtemp(prefix="attendance-bench-")
+    os.environ["ATTENDANCE_CACHE_DIR"] = cache_dir
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        report["stages"] = stage_benchmarks(args.repeat, args.slow_repeat)
+        if not args.skip_app:
+            report["app"] = app_benchmarks(args.app_reruns)
+        report["weather_stub_requests"] = stub.requests
+        predictions = fixture_predictions()
+    finally:
+        stub.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.update_reference or not os.path.exists(REFERENCE_PATH):
+        with open(REFERENCE_PATH, "w", encoding="utf-8") as file:
+            json.dump(predictions, file, indent=1)
+    with open(REFERENCE_PATH, encoding="utf-8") as file:
+        report["fixtures"] = compare_fixtures(predictions, json.load(file))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    failed = report["fixtures"]["mismatches"] or report.get("app", {}).get("exceptions")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Scrape a metrics endpoint once, check the exposition format and summarise it.
+
+    python benchmarks/scrape_metrics.py http://127.0.0.1:9108/metrics
+
+Parses the Prometheus text format the way a scraper would and checks that
+every sample belongs to a declared metric, histogram buckets are cumulative
+and ``_count`` matches the ``+Inf`` bucket, and that all metrics in
+``attendance.metrics`` are present. Prints p50/p95 estimates per histogram
+series, hit rates per cache and the counters. Exits with status 1 if a
+check fails.
+"""
+
+import argparse
+import re
+import sys
+from collections import defaultdict
+from urllib.request import urlopen
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+EXPECTED = {
+    "attendance_prediction_latency_seconds": "histogram",
+    "attendance_weather_fetch_latency_seconds": "histogram",
+    "attendance_predictions_total": "counter",
+    "attendance_weather_api_failures_total": "counter",
+    "attendance_cache_hits_total": "counter",
+    "attendance_cache_misses_total": "counter",
+    "attendance_weather_circuit_open": "gauge",
+}
+
+
+def parse(text):
+    """Metric types and samples as (name, labels, value) from the text format."""
+    types, samples, errors = {}, [], []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line or line.startswith("# HELP"):
+            continue
+        if line.startswith("# TYPE"):
+            _, _, name, kind = line.split(" ", 3)
+            types[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        if not match:
+            errors.append(f"line {number}: cannot parse {line!r}")
+            continue
+        name, _, labels, value = match.groups()
+        samples.append((name, dict(LABEL.findall(labels or "")), float(value)))
+    return types, samples, errors
+
+
+def base_name(name, types):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and types.get(name[:-len(suffix)]) == "histogram":
+            return name[:-len(suffix)]
+    return name
+
+
+def quantile(buckets, q):
+    """Upper bucket bound containing quantile ``q``, like ``histogram_quantile`` without interpolation."""
+    total = buckets[-1][1]
+    if not total:
+        return None
+    for bound, count in buckets:
+        if count >= q * total:
+            return bound
+    return float("inf")
+
+
+def check(types, samples):
+    errors = [f"{name}: expected, not exported" for name in EXPECTED if name not in types]
+    errors += [f"{name}: type {types[name]}, expected {kind}"
+               for name, kind in EXPECTED.items() if name in types and types[name] != kind]
+    histograms = defaultdict(lambda: {"buckets": [], "count": None})
+    for name, labels, value in samples:
+        metric = base_name(name, types)
+        if metric not in types:
+            errors.append(f"{name}: sample without a TYPE line")
+        if types.get(metric) == "histogram":
+            series = tuple(sorted((key, labels[key]) for key in labels if key != "le"))
+            if name.endswith("_bucket"):
+                histograms[metric, series]["buckets"].append((float(labels["le"]), value))
+            elif name.endswith("_count"):
+                histograms[metric, series]["count"] = value
+    for (metric, series), histogram in histograms.items():
+        counts = [count for _, count in histogram["buckets"]]
+        if counts != sorted(counts):
+            errors.append(f"{metric}{dict(series)}: buckets are not cumulative")
+        if not counts or histogram["buckets"][-1][0] != float("inf") or counts[-1] != histogram["count"]:
+            errors.append(f"{metric}{dict(series)}: _count does not match the +Inf bucket")
+    return histograms, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", nargs="?", default="http://127.0.0.1:9108/metrics")
+    args = parser.parse_args(argv)
+
+    with urlopen(args.url, timeout=10) as response:
+        text = response.read().decode("utf-8")
+    types, samples, errors = parse(text)
+    histograms, check_errors = check(types, samples)
+    errors += check_errors
+
+    for (metric, series), histogram in sorted(histograms.items()):
+        buckets = histogram["buckets"]
+        p50, p95 = quantile(buckets, 0.5), quantile(buckets, 0.95)
+        print(f"{metric}{dict(series)}: count={histogram['count'] or 0:.0f} p50<={p50} s p95<={p95} s")
+    caches = defaultdict(dict)
+    for name, labels, value in samples:
+        if name in ("attendance_cache_hits_total", "attendance_cache_misses_total"):
+            caches[labels["cache"]][name] = value
+        elif types.get(name) in ("counter", "gauge"):
+            print(f"{name}{labels}: {value:g}")
+    for cache, values in sorted(caches.items()):
+        hits, misses = values.get("attendance_cache_hits_total", 0), values.get("attendance_cache_misses_total", 0)
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        print(f"{cache} cache: {hits:g} hits, {misses:g} misses, hit rate {rate:.0%}")
+
+    for error in errors:
+        print(f"ERROR {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
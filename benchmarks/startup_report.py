@@ -0,0 +1,125 @@
+"""Cold-start report for the Streamlit app.
+
+Measures, each in a fresh interpreter:
+
+* how long every top-level module imported by the app takes to import
+  (from ``python -X importtime``), and
+* the time until the first full render of the app script, driven headlessly
+  through Streamlit's ``AppTest``.
+
+Both totals are compared against a budget and the script exits with status 1
+when one is exceeded, so it can be used as a local pre-deploy check:
+
+    python benchmarks/startup_report.py --cold --json startup.json
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_RENDER_SNIPPET = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"first_render": elapsed, "exceptions": [str(error.value) for error in app.exception]}))
+"""
+
+
+def app_import_code(app_path):
+    """The top-level import statements of the app script, as source code."""
+    with open(app_path, encoding="utf-8") as file:
+        tree = ast.parse(file.read())
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def measure_imports(app_path, env):
+    """Per-package cumulative import time in seconds, largest first."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", app_import_code(app_path)],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue
+        # Only top-level entries, i.e. the imports the app itself triggers
+        package = name.strip().split(".")[0]
+        timings[package] = timings.get(package, 0.0) + int(cumulative) / 1e6
+    return dict(sorted(timings.items(), key=lambda item: item[1], reverse=True))
+
+
+def measure_first_render(app_path, env):
+    completed = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER_SNIPPET, app_path],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(REPO_DIR, "app_v4_final.py"))
+    parser.add_argument("--budget-imports", type=float, default=2.0,
+                        help="maximum total import time in seconds (default: 2.0)")
+    parser.add_argument("--budget-first-render", type=float, default=5.0,
+                        help="maximum time to the first full render in seconds (default: 5.0)")
+    parser.add_argument("--cold", action="store_true",
+                        help="use an empty cache directory (no compiled models, no weather)")
+    parser.add_argument("--weather-url", help="Open-Meteo compatible URL, e.g. a local stub server")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.weather_url:
+        env["OPEN_METEO_URL"] = args.weather_url
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if args.cold:
+            env["ATTENDANCE_CACHE_DIR"] = cache_dir
+        imports = measure_imports(args.app, env)
+        render = measure_first_render(os.path.abspath(args.app), env)
+
+    report = {
+        "app": os.path.relpath(args.app, REPO_DIR),
+        "cold_cache": args.cold,
+        "imports": imports,
+        "imports_total": sum(imports.values()),
+        "first_render": render["first_render"],
+        "exceptions": render["exceptions"],
+        "budget": {"imports": args.budget_imports, "first_render": args.budget_first_render},
+    }
+    over_budget = (report["imports_total"] > args.budget_imports
+                   or report["first_render"] > args.budget_first_render
+                   or bool(report["exceptions"]))
+
+    print(f"Startup report for {report['app']} ({'cold' if args.cold else 'warm'} cache)")
+    print("Import time by top-level package:")
+    for package, seconds in imports.items():
+        print(f"  {package:<30} {seconds * 1000:8.1f} ms")
+    print(f"  {'total':<30} {report['imports_total'] * 1000:8.1f} ms  (budget {args.budget_imports * 1000:.0f} ms)")
+    print(f"First render: {report['first_render'] * 1000:.1f} ms  (budget {args.budget_first_render * 1000:.0f} ms)")
+    for error in report["exceptions"]:
+        print(f"Exception during first render: {error}")
+    print("OVER BUDGET" if over_budget else "Within budget")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
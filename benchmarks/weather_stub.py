@@ -0,0 +1,86 @@
+"""Local stand-in for the Open-Meteo forecast API.
+
+Answers single and multi-location hourly forecast requests with
+deterministic values, so benchmarks and smoke runs neither depend on the
+network nor vary with the real weather. Point the app at it with
+``OPEN_METEO_URL=http://127.0.0.1:<port>/v1/forecast``.
+
+Setting ``server.failure`` makes it misbehave like a struggling API:
+``"server_error"`` answers 503, ``"truncated"`` cuts a chunked body short.
+"""
+
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def hourly_forecast(start, days, location=0):
+    """A forecast shaped like Open-Meteo's ``hourly`` block."""
+    times = [f"{start + datetime.timedelta(days=day)}T{hour:02d}:00" for day in range(days) for hour in range(24)]
+    return {"hourly": {
+        "time": times,
+        "temperature_2m": [round(10 + location + (index % 24) / 10, 1) for index in range(len(times))],
+        "weathercode": [61 if (index // 24) % 2 else 2 for index in range(len(times))],
+    }}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.failure == "server_error":
+            self.send_error(503)
+            return
+        if self.server.failure == "truncated":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            # Announce 256 bytes, send a few and hang up
+            self.wfile.write(b"100\r\n{\"hourly\": ")
+            self.close_connection = True
+            return
+        query = parse_qs(urlparse(self.path).query)
+        latitudes = query["latitude"][0].split(",")
+        if "start_date" in query:
+            start, days = datetime.date.fromisoformat(query["start_date"][0]), 1
+        else:
+            start, days = datetime.date.today(), int(query.get("forecast_days", ["7"])[0])
+        forecasts = [hourly_forecast(start, days, location) for location in range(len(latitudes))]
+        body = json.dumps(forecasts if len(forecasts) > 1 else forecasts[0]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, delay=0.0, failure=None):
+    """Serve the stub on a background thread; ``port=0`` picks a free port.
+
+    Returns the server; its URL is ``stub_url(server)``.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.requests = 0
+    server.delay = delay
+    server.failure = failure
+    threading.Thread(target=server.serve_forever, name="weather-stub", daemon=True).start()
+    return server
+
+
+def stub_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+
+
+if __name__ == "__main__":
+    stub = start_stub(8765)
+    print(f"Weather stub listening on {stub_url(stub)}")
+    threading.Event().wait()